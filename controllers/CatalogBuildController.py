@@ -0,0 +1,138 @@
+import logging
+import os
+import sqlite3
+
+import pandas as pd
+
+from .BaseController import BaseController
+from .RAGController import RAGController
+
+
+class CatalogBuildController(BaseController):
+    """
+    Builds the car catalog's serving artifacts from the single source CSV (DATASET):
+    the SQLite database (DATABASE_SQL) used by the SQL agent, and the vector collection
+    used for RAG. The database gets typed columns, indexes on the columns generated
+    queries filter on, an FTS5 index over model names and planner statistics.
+    """
+
+    TABLE_NAME = "cars"
+
+    # Index columns that generated queries filter or sort on.
+    INDEXED_COLUMNS = ["Brand", "Price", "Body_Type", "Fuel_Type", "Drivetrain"]
+
+    # Text columns compared case-insensitively; NOCASE lets "Brand LIKE 'honda'" use the index.
+    NOCASE_COLUMNS = {"Brand", "Model_Number", "Body_Type", "Fuel_Type", "Gearbox_Type", "Drivetrain"}
+
+    # Columns of the CSV that are row numbers, not catalog data.
+    DROPPED_COLUMNS = ["Unnamed: 0", "id"]
+
+    FTS_COLUMN = "Model_Number"
+
+    def __init__(self):
+        super().__init__()
+        self.data_csv = self.get_dataset_path(db_name=self.app_settings.DATASET)
+        self.database_sql_path = self.get_database_sql_path(db_name=self.app_settings.DATABASE_SQL)
+        self.logger = logging.getLogger(__name__)
+
+    def load_dataset(self) -> pd.DataFrame:
+        df = pd.read_csv(self.data_csv)
+        return df.drop(columns=[column for column in self.DROPPED_COLUMNS if column in df.columns])
+
+    def column_definition(self, column: str, dtype) -> str:
+        if pd.api.types.is_integer_dtype(dtype):
+            column_type = "INTEGER"
+        elif pd.api.types.is_float_dtype(dtype):
+            column_type = "REAL"
+        else:
+            column_type = "TEXT"
+
+        collation = " COLLATE NOCASE" if column_type == "TEXT" and column in self.NOCASE_COLUMNS else ""
+        return f'"{column}" {column_type}{collation}'
+
+    def build_sql_database(self) -> str:
+        """
+        Creates the SQLite catalog from the CSV in one bulk transaction, then atomically
+        replaces DATABASE_SQL, so running readers see either the old or the new file.
+
+        :return: The path of the database.
+        """
+        df = self.load_dataset()
+        columns = list(df.columns)
+        # NaN -> NULL
+        rows = df.astype(object).where(pd.notna(df), None).itertuples(index=False, name=None)
+
+        os.makedirs(os.path.dirname(self.database_sql_path), exist_ok=True)
+        build_path = f"{self.database_sql_path}.build"
+        if os.path.exists(build_path):
+            os.remove(build_path)
+
+        connection = sqlite3.connect(build_path)
+        try:
+            # Nothing to recover from if the build fails half-way: skip journaling and fsyncs.
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+
+            column_definitions = ",\n  ".join(
+                self.column_definition(column, df[column].dtype) for column in columns
+            )
+            connection.execute(f"CREATE TABLE {self.TABLE_NAME} (\n  {column_definitions}\n)")
+
+            placeholders = ", ".join("?" for _ in columns)
+            with connection:
+                connection.executemany(f"INSERT INTO {self.TABLE_NAME} VALUES ({placeholders})", rows)
+
+            with connection:
+                for column in self.INDEXED_COLUMNS:
+                    if column in columns:
+                        connection.execute(
+                            f'CREATE INDEX "idx_{self.TABLE_NAME}_{column.lower()}" '
+                            f'ON {self.TABLE_NAME} ("{column}")'
+                        )
+
+            self.create_fts_index(connection, columns)
+
+            connection.execute("ANALYZE")
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+
+        os.replace(build_path, self.database_sql_path)
+        self.logger.info(f"Built {self.database_sql_path} with {len(df)} rows from {self.data_csv}.")
+        return self.database_sql_path
+
+    def create_fts_index(self, connection: sqlite3.Connection, columns: list) -> None:
+        """
+        Creates an external-content FTS5 table over the model names, for word matches
+        such as "civic" or "sport" without a LIKE '%...%' scan.
+        """
+        if self.FTS_COLUMN not in columns:
+            return
+
+        fts_table = f"{self.TABLE_NAME}_fts"
+        try:
+            with connection:
+                connection.execute(
+                    f'CREATE VIRTUAL TABLE {fts_table} USING fts5("{self.FTS_COLUMN}", '
+                    f"content='{self.TABLE_NAME}', content_rowid='rowid')"
+                )
+                connection.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            # SQLite builds without FTS5 still get a usable database.
+            self.logger.warning(f"Skipping the FTS5 index over {self.FTS_COLUMN}: {e}")
+
+    def build_vector_collection(self):
+        """
+        Re-indexes the vector collection from the same CSV.
+        :return: The collection info, or None on failure.
+        """
+        return RAGController(em=True).index_into_vector_db()
+
+    def build_all(self, with_vectors: bool = True) -> dict:
+        """
+        Rebuilds the SQL database and (optionally) the vector collection from DATASET.
+        """
+        result = {"database_sql_path": self.build_sql_database()}
+        if with_vectors:
+            result["vector_collection"] = self.build_vector_collection()
+        return result
@@ -1,13 +1,39 @@
-from typing import Dict, Tuple, Optional, List
+from typing import Dict, Optional, List, Union
+import asyncio
+import json
 import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
 
 from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from prometheus_client import Counter
 
-from .SQL_AgentController import SQL_AgentController
+from .SQL_AgentController import SQL_AgentController, SQLAgentBusy
+from .IntentRouterController import IntentRouterController, IntentEnums
 from .BaseController import BaseController
 from helpers.config import get_settings
+from helpers.cache import TTLCache
+from helpers.deadline import Deadline
+from helpers.text import (
+    normalize_query, estimate_tokens, truncate_to_tokens, compact_structured_rows, render_structured_rows
+)
+from helpers.tracer import AgentTracer
 from stores.llm.LLMProviderFactory import LLMProviderFactory
+from stores.llm.LLMEnums import LLMEnums
 from stores.llm.PromptTemplate import get_prompt_template
+from stores.llm.MessageBuilder import MessageBuilder
+from stores.conversation import (
+    ConversationStoreFactory, ConversationStoreInterface, ConversationStoreEnums, ConversationWindow
+)
+
+CONVERSATION_SUMMARIES = Counter(
+    "conversation_summaries_total",
+    "Background folds of old conversation turns into the running summary, by outcome (ok, stale, too_large or failed).",
+    ["outcome"]
+)
 
 
 class ChatbotController(BaseController):
@@ -17,16 +43,53 @@ class ChatbotController(BaseController):
     and handling SQL queries through an SQL agent.
     """
 
+    # Every observation keeps at least this many tokens, even when the scratchpad budget is spent.
+    MIN_OBSERVATION_TOKENS: int = 32
+    # Observations that report a failed tool call rather than a result (see execute_tool()
+    # and SQLiteExecutor.render()); they are never shown to the user as a partial answer.
+    TOOL_FAILURE_PATTERN = re.compile(
+        r"^(Error: |Error generating SQL response|Invalid arguments for |Missing required argument|"
+        r"Unknown tool|Tool \w+ timed out|The car database (did not answer|is busy)|No car image has been uploaded)"
+    )
+
+    # Summaries only need to restate facts, so a small model is enough; other backends use GENERATION_MODEL_ID.
+    SUMMARY_DEFAULT_MODEL_IDS: Dict[str, str] = {
+        LLMEnums.GROQ.value: "llama-3.1-8b-instant",
+        LLMEnums.OPENAI.value: "gpt-4o-mini",
+    }
+
     def __init__(self) -> None:
         """
         Initialize all required components for the Chatbot, including 
-        LLM, Vision, and SQL models, as well as an in-memory conversation store.
+        LLM, Vision, and SQL models, as well as the conversation store.
         """
         super().__init__()
 
-        # In-memory conversation store, keyed by (session_id, user_id).
-        # The value is a string representing the full conversation so far.
-        self.conversation_store: Dict[Tuple[str, str], str] = {}
+        # Conversation store, keyed by (session_id, user_id), bounded and with idle-session expiry.
+        # The value is a list of turns with their token counts and a summary of older turns
+        # (see ConversationWindow).
+        conversation_store_factory = ConversationStoreFactory(self.app_settings)
+        self.conversation_store: ConversationStoreInterface = conversation_store_factory.create(
+            provider=self.app_settings.CONVERSATION_STORE_BACKEND
+        )
+        if self.conversation_store is None:
+            logging.warning(
+                f"Unknown CONVERSATION_STORE_BACKEND {self.app_settings.CONVERSATION_STORE_BACKEND!r}; "
+                f"keeping conversations in memory."
+            )
+            self.conversation_store = conversation_store_factory.create(
+                provider=ConversationStoreEnums.MEMORY.value
+            )
+
+        # Selects the recent turns sent with each request.
+        self.conversation_window = ConversationWindow(
+            max_turns=self.app_settings.CONVERSATION_WINDOW_MAX_TURNS,
+            max_tokens=self.app_settings.CONVERSATION_WINDOW_MAX_TOKENS,
+            max_stored_turns=self.app_settings.CONVERSATION_MAX_STORED_TURNS
+        )
+
+        # Serializes read-modify-write updates of a conversation within this process.
+        self.conversation_lock = threading.Lock()
 
         # Load prompt templates.
         self.prompt_template = get_prompt_template()
@@ -59,22 +122,98 @@ class ChatbotController(BaseController):
         )
         self.llm_sql = self.text_generation_client_sql.LLM_CHAT()
 
+        # Cheap model that folds turns falling out of the window into a running summary,
+        # on a single background thread so it never adds to a request's latency.
+        self.summary_client = None
+        if self.app_settings.CONVERSATION_SUMMARY_ENABLED:
+            summary_backend = self.app_settings.CONVERSATION_SUMMARY_BACKEND or self.app_settings.GENERATION_BACKEND
+            self.summary_client = self.llm_provider_factory.create(provider=summary_backend)
+            self.summary_client.set_generation_model(
+                model_id=self.app_settings.CONVERSATION_SUMMARY_MODEL_ID or self.SUMMARY_DEFAULT_MODEL_IDS.get(
+                    summary_backend, self.app_settings.GENERATION_MODEL_ID
+                )
+            )
+        self.summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation-summary")
+        self.summaries_in_progress = set()
+
+        # Optional embeddings for similar-question hits in the NL-to-SQL cache.
+        embed = None
+        if self.app_settings.NL_TO_SQL_SIMILARITY_ENABLED:
+            self.text_embedding_client = self.llm_provider_factory.create(
+                provider=self.app_settings.EMBEDDING_BACKEND
+            )
+            self.text_embedding_client.set_embedding_model(
+                model_id=self.app_settings.EMBEDDING_MODEL_ID
+            )
+            embed = self.text_embedding_client.embed_text
+
         # Initialize the SQL_AgentController.
-        self.sql_agent = SQL_AgentController(self.llm_sql)
+        self.sql_agent = SQL_AgentController(self.llm_sql, embed=embed)
+
+        # Agent system prompt and native tool definitions from the prompt template.
+        self.react_system_prompt: str = self.prompt_template.react_tools_system_prompt()
+        self.react_tools: List[dict] = self.prompt_template.react_tool_schemas()
+        self.react_stop_sequences: List[str] = self.prompt_template.react_stop_sequences()
+
+        # Shared, immutable message prefix for every ReAct run.
+        self.react_prefix = MessageBuilder().add("system", self.react_system_prompt)
+
+        # Local fast-path router that runs before the ReAct agent.
+        self.intent_router: Optional[IntentRouterController] = None
+        if self.app_settings.INTENT_ROUTER_ENABLED:
+            self.intent_router = IntentRouterController()
+
+        # Bounded executor for running several tool calls of one agent step concurrently.
+        self.tool_executor = ThreadPoolExecutor(
+            max_workers=self.app_settings.AGENT_TOOL_MAX_WORKERS,
+            thread_name_prefix="agent-tool"
+        )
+
+        # Cache of SQL tool observations, keyed by normalized question and database version.
+        self.tool_cache: Optional[TTLCache] = None
+        if self.app_settings.TOOL_CACHE_ENABLED:
+            self.tool_cache = TTLCache(
+                name="sql_tool",
+                max_entries=self.app_settings.TOOL_CACHE_MAX_ENTRIES,
+                ttl_seconds=self.app_settings.TOOL_CACHE_TTL_SECONDS
+            )
+
+        # Separate executor for the SQL chain, so a deadline can bound it even when it
+        # is called from a tool thread (sharing tool_executor could deadlock).
+        self.sql_executor = ThreadPoolExecutor(
+            max_workers=self.app_settings.AGENT_TOOL_MAX_WORKERS,
+            thread_name_prefix="sql-chain"
+        )
+
+    def get_conversation(self, session_id: str, user_id: str) -> dict:
+        """
+        Retrieve the stored conversation, or a new empty one if none is found (or it expired).
 
-        # ReAct system prompt from the prompt template.
-        self.react_system_prompt: str = self.prompt_template.react_system_prompt()
+        :param session_id: The session identifier.
+        :param user_id: The user identifier.
+        :return: The conversation, as {"turns": [...]}.
+        """
+        return ConversationWindow.load(self.conversation_store.get(session_id, user_id))
+
+    def get_conversation_turns(self, session_id: str, user_id: str) -> List[dict]:
+        """
+        Retrieve the recent turns that fit the conversation window.
+
+        :param session_id: The session identifier.
+        :param user_id: The user identifier.
+        :return: The windowed turns, oldest first; empty if there is no conversation yet.
+        """
+        return self.conversation_window.window(self.get_conversation(session_id, user_id))
 
     def get_conversation_history(self, session_id: str, user_id: str) -> str:
         """
-        Retrieve the conversation history from the in-memory store, if it exists.
+        Retrieve the windowed conversation history as text.
 
         :param session_id: The session identifier.
         :param user_id: The user identifier.
         :return: The conversation text, or an empty string if none is found.
         """
-        key = (session_id, user_id)
-        return self.conversation_store.get(key, "")
+        return ConversationWindow.render(self.get_conversation_turns(session_id, user_id))
 
     def append_to_history(
         self,
@@ -91,15 +230,134 @@ class ChatbotController(BaseController):
         :param user_text: The text of the user's message.
         :param assistant_text: The text of the assistant's response.
         """
+        with self.conversation_lock:
+            conversation = self.get_conversation(session_id, user_id)
+            updated_conversation = self.conversation_window.append(conversation, user_text, assistant_text)
+            self.conversation_store.set(session_id, user_id, updated_conversation)
+
+        self.schedule_summary(session_id, user_id, updated_conversation)
+
+    def schedule_summary(self, session_id: str, user_id: str, conversation: dict) -> None:
+        """
+        Starts folding the turns that fell out of the window into the summary, in the
+        background, unless summarization is disabled or already running for this session.
+
+        :param session_id: The session identifier.
+        :param user_id: The user identifier.
+        :param conversation: The conversation as just stored.
+        """
+        if self.summary_client is None:
+            return
+
+        folded_turns = self.conversation_window.turns_to_fold(
+            conversation, min_turns=self.app_settings.CONVERSATION_SUMMARY_MIN_TURNS
+        )
+        if not folded_turns:
+            return
+
         key = (session_id, user_id)
-        existing_history = self.conversation_store.get(key, "")
+        with self.conversation_lock:
+            if key in self.summaries_in_progress:
+                return
+            self.summaries_in_progress.add(key)
 
-        updated_history = (
-            f"{existing_history}\n"
-            f"User: {user_text}\n"
-            f"Assistant: {assistant_text}"
+        self.summary_executor.submit(
+            self.summarize_conversation, session_id, user_id, conversation.get("summary", ""), folded_turns
         )
-        self.conversation_store[key] = updated_history
+
+    def summarize_conversation(self, session_id: str, user_id: str, summary: str, folded_turns: List[dict]) -> None:
+        """
+        Folds the given turns into the summary with the summary model, then replaces them
+        with the new summary in the store, unless the conversation changed meanwhile.
+
+        :param session_id: The session identifier.
+        :param user_id: The user identifier.
+        :param summary: The current summary, if any.
+        :param folded_turns: The oldest turns of the conversation, to fold into the summary.
+        """
+        max_tokens = self.app_settings.CONVERSATION_SUMMARY_MAX_TOKENS
+        try:
+            # Fold only the oldest turns that fit the input budget; the rest wait for the next fold.
+            # Nothing is folded that the model did not see in full.
+            folded_turns = self.turns_within_budget(summary, folded_turns)
+            if not folded_turns:
+                CONVERSATION_SUMMARIES.labels(outcome="too_large").inc()
+                logging.warning("The oldest conversation turn exceeds the summary input budget; not folding it.")
+                return
+
+            # The input goes in chat_history: providers cut the `prompt` argument to INPUT_DAFAULT_MAX_CHARACTERS.
+            new_summary = self.summary_client.generate_text(
+                prompt="",
+                chat_history=[
+                    {
+                        "role": "system",
+                        "content": self.prompt_template.conversation_summary_system_prompt(max_words=max_tokens * 3 // 4)
+                    },
+                    {
+                        "role": "user",
+                        "content": self.prompt_template.conversation_summary_user_prompt(
+                            summary, ConversationWindow.render(folded_turns)
+                        )
+                    }
+                ],
+                max_output_tokens=max_tokens,
+                temperature=0.0,
+                type_chat="agent",
+                timeout=self.app_settings.LLM_REQUEST_TIMEOUT_SECONDS
+            )
+            if not new_summary:
+                CONVERSATION_SUMMARIES.labels(outcome="failed").inc()
+                return
+
+            with self.conversation_lock:
+                conversation = self.get_conversation(session_id, user_id)
+                updated_conversation = self.conversation_window.fold(
+                    conversation, folded_turns, truncate_to_tokens(new_summary.strip(), max_tokens)
+                )
+                if updated_conversation is None:
+                    CONVERSATION_SUMMARIES.labels(outcome="stale").inc()
+                    return
+                self.conversation_store.set(session_id, user_id, updated_conversation)
+            CONVERSATION_SUMMARIES.labels(outcome="ok").inc()
+        except Exception as e:
+            CONVERSATION_SUMMARIES.labels(outcome="failed").inc()
+            logging.error(f"Error summarizing the conversation: {str(e)}")
+            return
+        finally:
+            with self.conversation_lock:
+                self.summaries_in_progress.discard((session_id, user_id))
+
+        # Turns added while this summary was being written may be due for folding too.
+        self.schedule_summary(session_id, user_id, updated_conversation)
+
+    def turns_within_budget(self, summary: str, turns: List[dict]) -> List[dict]:
+        """
+        :return: The oldest of the turns that fit CONVERSATION_SUMMARY_MAX_INPUT_TOKENS
+            together with the current summary.
+        """
+        budget = self.app_settings.CONVERSATION_SUMMARY_MAX_INPUT_TOKENS - estimate_tokens(summary)
+        selected = []
+        for turn in turns:
+            budget -= turn["tokens"]
+            if budget < 0:
+                break
+            selected.append(turn)
+        return selected
+
+    @staticmethod
+    def history_messages(conversation_history: Union[str, List[dict]]) -> List[dict]:
+        """
+        Converts the conversation history to chat messages: windowed turns become user and
+        assistant messages; a plain-text history (sent by older clients) stays one message.
+
+        :param conversation_history: Turns from get_conversation_turns(), or conversation text.
+        :return: The messages to put before the user's prompt.
+        """
+        if not conversation_history:
+            return []
+        if isinstance(conversation_history, str):
+            return [{"role": "assistant", "content": f"Conversation history: {conversation_history}"}]
+        return ConversationWindow.to_messages(conversation_history)
 
     def process_uploaded_image(self, file: UploadFile) -> str:
         """
@@ -119,99 +377,579 @@ class ChatbotController(BaseController):
                 detail=f"Error analyzing the image: {str(e)}"
             ) from e
 
-    def handle_sql_mode(self, user_prompt: str) -> str:
+    def sql_cache_key(self, user_prompt: str, structured: bool) -> Optional[tuple]:
+        # Answers are cached per database version, so replacing DATABASE_SQL invalidates them.
+        if self.tool_cache is None:
+            return None
+        return normalize_query(user_prompt), self.sql_agent.catalog_version(), structured
+
+    def handle_sql_mode(
+        self,
+        user_prompt: str,
+        deadline: Optional[Deadline] = None,
+        structured: bool = False
+    ) -> str:
         """
         Handle SQL-related queries through the SQL_AgentController.
 
         :param user_prompt: The user's prompt or query.
+        :param deadline: The request deadline; the SQL chain is abandoned when it runs out.
+        :param structured: Return the query and its rows as JSON instead of a phrased answer.
         :return: The assistant's response after executing the SQL query.
         """
+        cache_key = self.sql_cache_key(user_prompt, structured)
+        if cache_key is not None:
+            cached_response = self.tool_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+
         try:
-            assistant_response = self.sql_agent.chat_agent_with_sql(user_prompt)
-            return assistant_response
+            if deadline is None or deadline.remaining() is None:
+                assistant_response, succeeded = self.sql_agent.answer_question(user_prompt, structured=structured)
+            else:
+                future = self.sql_executor.submit(
+                    self.sql_agent.answer_question, user_prompt, structured=structured
+                )
+                try:
+                    assistant_response, succeeded = future.result(timeout=deadline.remaining())
+                except FutureTimeoutError:
+                    # A running thread cannot be killed: the chain finishes in the background
+                    # (its LLM calls are bounded by LLM_REQUEST_TIMEOUT_SECONDS) and is discarded.
+                    future.cancel()
+                    Deadline.record_exhausted("sql")
+                    logging.warning("SQL chain did not finish before the request deadline.")
+                    return "The car database did not answer in time."
         except Exception as e:
             logging.error(f"Error in SQL mode: {str(e)}")
             return f"Error generating SQL response: {str(e)}"
 
+        # Answers built from a failed or rejected query are not cached.
+        if cache_key is not None and assistant_response and succeeded:
+            self.tool_cache.set(cache_key, assistant_response)
+        return assistant_response
+
+    async def ahandle_sql_mode(
+        self,
+        user_prompt: str,
+        deadline: Optional[Deadline] = None,
+        structured: bool = False
+    ) -> str:
+        """
+        Async variant of handle_sql_mode(): runs the SQL chain on the event loop through
+        SQL_AgentController.aanswer_question(), and cancels it when the deadline runs out.
+
+        :param user_prompt: The user's prompt or query.
+        :param deadline: The request deadline.
+        :param structured: Return the query and its rows as JSON instead of a phrased answer.
+        :return: The assistant's response after executing the SQL query.
+        """
+        cache_key = self.sql_cache_key(user_prompt, structured)
+        if cache_key is not None:
+            cached_response = self.tool_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+
+        timeout = deadline.remaining() if deadline is not None else None
+        try:
+            assistant_response, succeeded = await asyncio.wait_for(
+                self.sql_agent.aanswer_question(user_prompt, structured=structured),
+                timeout=timeout
+            )
+        except SQLAgentBusy:
+            # A momentary overload: answer now, but never cache it.
+            return "The car database is busy right now. Please try again in a moment."
+        except asyncio.TimeoutError:
+            # Unlike the threaded path, the pending LLM call is cancelled with the task.
+            Deadline.record_exhausted("sql")
+            logging.warning("SQL chain did not finish before the request deadline.")
+            return "The car database did not answer in time."
+        except Exception as e:
+            logging.error(f"Error in SQL mode: {str(e)}")
+            return f"Error generating SQL response: {str(e)}"
+
+        # Answers built from a failed or rejected query are not cached.
+        if cache_key is not None and assistant_response and succeeded:
+            self.tool_cache.set(cache_key, assistant_response)
+        return assistant_response
+
+    def handle_chat_mode(
+        self,
+        user_prompt: str,
+        conversation_history: Union[str, List[dict]] = "",
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        Answer general conversation with a single chat completion, without tools.
+
+        :param user_prompt: The user's prompt or query.
+        :param conversation_history: The windowed previous turns, or conversation text, if any.
+        :param deadline: The request deadline, used to bound the provider call.
+        :return: The assistant's response.
+        """
+        deadline = deadline or Deadline()
+        chat_history: List[Dict[str, str]] = self.history_messages(conversation_history)
+
+        assistant_response = None
+        if not deadline.expired():
+            try:
+                assistant_response = self.text_generation_client.generate_text(
+                    prompt=user_prompt,
+                    chat_history=chat_history,
+                    type_chat="chat",
+                    timeout=deadline.timeout(self.app_settings.LLM_REQUEST_TIMEOUT_SECONDS)
+                )
+            except Exception as e:
+                logging.error(f"Error in chat mode: {str(e)}")
+        return assistant_response or "I'm sorry, but I couldn't generate a response."
+
+    def answer(
+        self,
+        user_prompt: str,
+        conversation_history: Union[str, List[dict]] = "",
+        car_details: str = "",
+        deadline: Optional[Deadline] = None,
+        tracer: Optional[AgentTracer] = None
+    ) -> str:
+        """
+        Answer the user's query, skipping the ReAct agent when the local intent
+        router is confident that the message is a plain SQL/catalog question or
+        chit-chat. Everything else goes to the agent.
+
+        :param user_prompt: The user's input text.
+        :param conversation_history: The windowed previous turns, or conversation text, if any.
+        :param car_details: Details extracted from an image, if any.
+        :param deadline: The request deadline; defaults to AGENT_REQUEST_TIMEOUT_SECONDS from now.
+        :param tracer: Receives live progress events; disabled if omitted.
+        :return: The assistant's response.
+        """
+        if deadline is None:
+            deadline = Deadline(self.app_settings.AGENT_REQUEST_TIMEOUT_SECONDS)
+        tracer = tracer or AgentTracer()
+
+        intent = self.route_fast_path(user_prompt, conversation_history, car_details, tracer)
+        return self.dispatch(intent, user_prompt, conversation_history, car_details, deadline, tracer)
+
+    async def aanswer(
+        self,
+        user_prompt: str,
+        conversation_history: Union[str, List[dict]] = "",
+        car_details: str = "",
+        deadline: Optional[Deadline] = None,
+        tracer: Optional[AgentTracer] = None
+    ) -> str:
+        """
+        Async variant of answer() for request handlers. Fast-path SQL questions run on the
+        async SQL path (when SQL_ASYNC_ENABLED); chit-chat and the ReAct agent run in a
+        worker thread, so the event loop is never blocked.
+
+        :param user_prompt: The user's input text.
+        :param conversation_history: The windowed previous turns, or conversation text, if any.
+        :param car_details: Details extracted from an image, if any.
+        :param deadline: The request deadline; defaults to AGENT_REQUEST_TIMEOUT_SECONDS from now.
+        :param tracer: Receives live progress events; disabled if omitted.
+        :return: The assistant's response.
+        """
+        if deadline is None:
+            deadline = Deadline(self.app_settings.AGENT_REQUEST_TIMEOUT_SECONDS)
+        tracer = tracer or AgentTracer()
+
+        intent = self.route_fast_path(user_prompt, conversation_history, car_details, tracer)
+        if intent == IntentEnums.SQL.value and self.app_settings.SQL_ASYNC_ENABLED:
+            assistant_response = await self.ahandle_sql_mode(user_prompt, deadline=deadline)
+            tracer.emit("final_answer", content=assistant_response)
+            return assistant_response
+
+        return await run_in_threadpool(
+            self.dispatch, intent, user_prompt, conversation_history, car_details, deadline, tracer
+        )
+
+    def route_fast_path(
+        self,
+        user_prompt: str,
+        conversation_history: Union[str, List[dict]],
+        car_details: str,
+        tracer: AgentTracer
+    ) -> Optional[str]:
+        """
+        Asks the local intent router whether the message can skip the ReAct agent.
+
+        :return: The fast-path intent (IntentEnums.SQL or IntentEnums.CHAT), or None for the agent.
+        """
+        if not self.intent_router:
+            return None
+
+        intent, confidence = self.intent_router.route(
+            user_prompt,
+            has_history=bool(conversation_history),
+            has_image=bool(car_details)
+        )
+        fast_path = self.intent_router.is_confident(confidence) and intent != IntentEnums.AGENT.value
+        self.intent_router.record_decision(intent, fast_path)
+        tracer.emit("route", intent=intent, confidence=confidence, fast_path=fast_path)
+        return intent if fast_path else None
+
+    def dispatch(
+        self,
+        intent: Optional[str],
+        user_prompt: str,
+        conversation_history: Union[str, List[dict]],
+        car_details: str,
+        deadline: Deadline,
+        tracer: AgentTracer
+    ) -> str:
+        """
+        Answers through the fast path chosen by route_fast_path(), or the ReAct agent.
+        """
+        if intent == IntentEnums.SQL.value:
+            assistant_response = self.handle_sql_mode(user_prompt, deadline=deadline)
+            tracer.emit("final_answer", content=assistant_response)
+            return assistant_response
+        if intent == IntentEnums.CHAT.value:
+            assistant_response = self.handle_chat_mode(user_prompt, conversation_history, deadline=deadline)
+            tracer.emit("final_answer", content=assistant_response)
+            return assistant_response
+
+        return self.react_agent(
+            user_prompt=user_prompt,
+            conversation_history=conversation_history,
+            car_details=car_details,
+            deadline=deadline,
+            tracer=tracer
+        )
+
+    def execute_tool(
+        self,
+        tool_name: str,
+        arguments: str,
+        car_details: str = "",
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        Execute one tool call requested by the model.
+
+        :param tool_name: The name of the tool, as declared in the tool schemas.
+        :param arguments: The JSON-encoded arguments produced by the model.
+        :param car_details: Details extracted from an uploaded image, if any.
+        :param deadline: The request deadline, passed on to the tool.
+        :return: The observation to send back to the model.
+        """
+        try:
+            tool_args = json.loads(arguments) if arguments else {}
+        except json.JSONDecodeError:
+            return f"Invalid arguments for {tool_name}: {arguments}"
+
+        if tool_name == "handle_sql_mode":
+            question = tool_args.get("question")
+            if not question:
+                return "Missing required argument: question."
+            # The agent phrases the final answer anyway, so it can take the rows as they are.
+            return self.handle_sql_mode(
+                question,
+                deadline=deadline,
+                structured=self.app_settings.SQL_RETURN_STRUCTURED_TO_AGENT
+            )
+
+        if tool_name == "process_uploaded_image":
+            return car_details or "No car image has been uploaded in this conversation."
+
+        return f"Unknown tool: {tool_name}"
+
+    def execute_tool_calls(
+        self,
+        tool_calls: List[dict],
+        car_details: str = "",
+        deadline: Optional[Deadline] = None,
+        tracer: Optional[AgentTracer] = None,
+        step: int = None
+    ) -> List[str]:
+        """
+        Execute all tool calls of one agent step, concurrently when there are several.
+        Tools still running when the deadline passes are abandoned and reported as timed out.
+
+        :param tool_calls: The tool calls returned by the model, in order.
+        :param car_details: Details extracted from an uploaded image, if any.
+        :param deadline: The request deadline.
+        :param tracer: Receives an observation event as each tool finishes.
+        :param step: The agent step the calls belong to, for the trace.
+        :return: The observations, in the same order as the tool calls.
+        """
+        deadline = deadline or Deadline()
+        tracer = tracer or AgentTracer()
+
+        def run(tool_call: dict) -> str:
+            started_at = time.perf_counter()
+            observation_result = self.execute_tool(
+                tool_name=tool_call["name"],
+                arguments=tool_call["arguments"],
+                car_details=car_details,
+                deadline=deadline
+            )
+            if tracer.enabled:
+                tracer.emit(
+                    "observation",
+                    step=step,
+                    id=tool_call["id"],
+                    name=tool_call["name"],
+                    content=observation_result,
+                    duration_ms=tracer.elapsed_ms(started_at)
+                )
+            return observation_result
+
+        if len(tool_calls) == 1:
+            return [run(tool_calls[0])]
+
+        futures = [self.tool_executor.submit(run, tool_call) for tool_call in tool_calls]
+        wait(futures, timeout=deadline.remaining())
+
+        # Collect in submission order, so observations are deterministic.
+        observations = []
+        for tool_call, future in zip(tool_calls, futures):
+            if future.done():
+                observations.append(future.result())
+            else:
+                future.cancel()
+                Deadline.record_exhausted("tool")
+                tracer.emit("tool_timeout", step=step, id=tool_call["id"], name=tool_call["name"])
+                observations.append(f"Tool {tool_call['name']} timed out.")
+        return observations
+
+    def compact_observation(self, observation: str, max_tokens: int) -> str:
+        """
+        Shrink a tool observation before it enters the agent's scratchpad: a structured
+        SQL result keeps as many rows as fit the token budget and stays valid JSON; other
+        text loses repeated lines and extra whitespace and is truncated to the budget.
+
+        :param observation: The raw tool output.
+        :param max_tokens: The token budget for this observation.
+        :return: The compacted observation.
+        """
+        structured = compact_structured_rows(observation, max_tokens)
+        if structured is not None:
+            return structured
+        observation = observation or ""
+
+        lines, seen_lines = [], set()
+        for line in observation.splitlines():
+            line = " ".join(line.split())
+            if line and line not in seen_lines:
+                seen_lines.add(line)
+                lines.append(line)
+
+        return truncate_to_tokens("\n".join(lines), max_tokens)
+
+    def partial_answer(self, results: List[str]) -> str:
+        """
+        Presents tool results as an explicitly partial answer: structured rows as a short
+        table, phrased answers as they are, each within the observation budget.
+        """
+        sections = [
+            truncate_to_tokens(
+                render_structured_rows(result) or result.strip(),
+                self.app_settings.AGENT_OBSERVATION_MAX_TOKENS
+            )
+            for result in results
+        ]
+        return "I couldn't finish the full answer, but here is what I found so far:\n\n" + "\n\n".join(sections)
+
+    def generate_agent_step(
+        self,
+        messages: MessageBuilder,
+        deadline: Deadline,
+        final: bool = False,
+        answer_budget: bool = False
+    ) -> Optional[dict]:
+        """
+        Run one agent generation with the agent's stop sequences.
+
+        :param messages: The agent's messages so far.
+        :param deadline: The request deadline.
+        :param final: Whether this step must produce the answer (no tool calls, answer budget).
+        :param answer_budget: Give a tool-selection step the answer budget instead of the small one.
+        :return: The provider's reply, or None on failure, timeout or an expired deadline.
+        """
+        if deadline.expired():
+            return None
+        try:
+            return self.text_generation_client.generate_with_tools(
+                chat_history=messages.build(),
+                tools=self.react_tools,
+                max_output_tokens=(
+                    self.app_settings.AGENT_ANSWER_MAX_TOKENS if final or answer_budget
+                    else self.app_settings.AGENT_TOOL_STEP_MAX_TOKENS
+                ),
+                tool_choice="none" if final else "auto",
+                timeout=deadline.timeout(self.app_settings.LLM_REQUEST_TIMEOUT_SECONDS),
+                stop=self.react_stop_sequences
+            )
+        except Exception as e:
+            logging.error(f"Error generating the agent step: {str(e)}")
+            return None
+
+    @staticmethod
+    def has_truncated_tool_call(reply: dict) -> bool:
+        """
+        Whether the reply hit the output budget in the middle of a tool call's arguments.
+        """
+        if reply.get("finish_reason") != "length":
+            return False
+        for tool_call in reply.get("tool_calls") or []:
+            try:
+                if tool_call["arguments"]:
+                    json.loads(tool_call["arguments"])
+            except (TypeError, ValueError):
+                return True
+        return False
+
     def react_agent(
         self,
         user_prompt: str,
-        conversation_history: str = "",
-        car_details: str = ""
+        conversation_history: Union[str, List[dict]] = "",
+        car_details: str = "",
+        deadline: Optional[Deadline] = None,
+        tracer: Optional[AgentTracer] = None
     ) -> str:
         """
         Execute the ReAct Agent approach to handle the user's query.
-        It iterates through the pattern: Thought -> Action -> Observation -> Answer.
+        The model reasons and requests tools through the provider's native
+        tool-calling API; tool results are sent back as tool messages until
+        the model replies without a tool call.
+
+        Every step is bounded by the request deadline. When it runs out, or a
+        step fails (e.g. the provider timed out), the latest tool observations
+        are returned as a partial answer.
 
         :param user_prompt: The user's input text.
-        :param conversation_history: The previous conversation text, if any.
+        :param conversation_history: The windowed previous turns, or conversation text, if any.
         :param car_details: Details extracted from an image, if any.
+        :param deadline: The request deadline; no limit if omitted.
+        :param tracer: Receives step, thought, tool call, observation and final answer events.
         :return: The final answer, or a fallback message if no answer is found.
         """
-        # Prepare the message list for the LLM.
-        messages: List[Dict[str, str]] = []
-        messages.append({"role": "system", "content": self.react_system_prompt})
+        deadline = deadline or Deadline()
+        tracer = tracer or AgentTracer()
+
+        # Build the message prefix once: it stays byte-identical across iterations,
+        # and each iteration only appends its own reply and observations.
+        messages = self.react_prefix
 
-        if conversation_history:
-            messages.append({
-                "role": "assistant",
-                "content": f"Conversation history: {conversation_history}"
-            })
+        messages = messages.extend(self.history_messages(conversation_history))
 
         if car_details:
-            messages.append({
-                "role": "assistant",
-                "content": f"Car image details: {car_details}"
-            })
-
-        # Include the user's prompt.
-        messages.append({"role": "user", "content": user_prompt})
-
-        max_iterations: int = 3
-        for _ in range(max_iterations):
-            assistant_reply = self.text_generation_client.generate_text(
-                prompt=self.prompt_template.text_propt_user(user_prompt),
-                chat_history=messages
-            )
+            messages = messages.add("assistant", f"Car image details: {car_details}")
+
+        messages = messages.add("user", user_prompt)
+
+        # Latest usable tool results, returned as a partial answer if the deadline runs out
+        # or a step fails before a final answer.
+        partial_results: List[str] = []
+        step_failed: bool = False
+
+        # Observations are compacted as they are appended, within a fixed scratchpad budget,
+        # so the messages only ever grow by a bounded amount and the prefix stays unchanged.
+        scratchpad_tokens: int = 0
+        seen_observations: Dict[str, str] = {}
+
+        max_iterations: int = self.app_settings.AGENT_MAX_ITERATIONS
+        for iteration in range(max_iterations):
+            if deadline.expired():
+                Deadline.record_exhausted("agent_step")
+                tracer.emit("deadline_exhausted", step=iteration)
+                logging.warning(f"Request deadline reached after {iteration} agent step(s).")
+                break
+
+            step_started_at = time.perf_counter()
+            tracer.emit("step_start", step=iteration)
+
+            # On the last iteration, force a text answer instead of another tool call.
+            # Tool-selection steps get a small output budget, answer steps the full one.
+            is_last_iteration = iteration == max_iterations - 1
+            reply = self.generate_agent_step(messages, deadline, final=is_last_iteration)
+            if not reply:
+                step_failed = True
+                continue
 
-            # Add the assistant's reply to the message list.
-            messages.append({"role": "assistant", "content": assistant_reply})
-
-            # Check if the reply contains the final answer.
-            if "Answer:" in assistant_reply:
-                final_answer = assistant_reply.split("Answer:", 1)[1].strip()
-                return final_answer
-
-            # Check if the reply contains an Action step.
-            if "Action:" in assistant_reply:
-                # Expected format: "Action: handle_sql_mode: <INPUT>"
-                action_part = assistant_reply.split("Action:", 1)[1].strip()
-
-                if ":" in action_part:
-                    tool_name, tool_input = action_part.split(":", 1)
-                    tool_name = tool_name.strip()
-                    tool_input = tool_input.strip()
-
-                    observation_result: Optional[str] = None
-                    if tool_name == "handle_sql_mode":
-                        observation_result = self.handle_sql_mode(tool_input)
-                    elif tool_name == "process_uploaded_image":
-                        # For a real application, the actual file would need to be passed.
-                        observation_result = f"(Mocked) Called process_uploaded_image with: {tool_input}"
-                    else:
-                        observation_result = f"Unknown tool: {tool_name}"
-
-                    messages.append({
-                        "role": "system",
-                        "content": f"Observation: {observation_result}"
-                    })
-                else:
-                    messages.append({
-                        "role": "system",
-                        "content": "Observation: Could not parse Action properly."
-                    })
-            else:
-                # If there is no Action, continue until we find an answer or reach the iteration limit.
+            if self.has_truncated_tool_call(reply):
+                # The tool-step budget cut the call's arguments short; retry with the answer budget.
+                logging.warning("Tool call arguments were truncated; retrying the step with the answer budget.")
+                reply = self.generate_agent_step(messages, deadline, answer_budget=True)
+                if not reply or self.has_truncated_tool_call(reply):
+                    step_failed = True
+                    continue
+
+            tool_calls = reply.get("tool_calls") or []
+            if not tool_calls and reply.get("finish_reason") == "length" and not is_last_iteration:
+                # The model started answering within the tool-step budget; ask again for the full answer.
+                reply = self.generate_agent_step(messages, deadline, final=True)
+                if not reply:
+                    step_failed = True
+                    continue
+                tool_calls = reply.get("tool_calls") or []
+            if not tool_calls:
+                content = reply.get("content") or ""
+                # Older prompts asked for "Answer: <text>"; strip the marker if the model still emits it.
+                if "Answer:" in content:
+                    content = content.split("Answer:", 1)[1]
+                if content.strip():
+                    tracer.emit("final_answer", step=iteration, content=content.strip(),
+                                duration_ms=tracer.elapsed_ms(step_started_at))
+                    return content.strip()
                 continue
 
-        return "I'm sorry, but I couldn't find a final answer."
+            if tracer.enabled:
+                if reply.get("content"):
+                    tracer.emit("thought", step=iteration, content=reply["content"],
+                                duration_ms=tracer.elapsed_ms(step_started_at))
+                for tool_call in tool_calls:
+                    tracer.emit("tool_call", step=iteration, id=tool_call["id"],
+                                name=tool_call["name"], arguments=tool_call["arguments"])
+
+            scratchpad_tokens += estimate_tokens(reply.get("content")) + sum(
+                estimate_tokens(tool_call["arguments"]) for tool_call in tool_calls
+            )
+            messages = messages.add(
+                "assistant",
+                reply.get("content"),
+                tool_calls=[
+                    {
+                        "id": tool_call["id"],
+                        "type": "function",
+                        "function": {"name": tool_call["name"], "arguments": tool_call["arguments"]}
+                    }
+                    for tool_call in tool_calls
+                ]
+            )
+            observations = self.execute_tool_calls(
+                tool_calls,
+                car_details=car_details,
+                deadline=deadline,
+                tracer=tracer,
+                step=iteration
+            )
+            for index, (tool_call, observation_result) in enumerate(zip(tool_calls, observations)):
+                # Share what is left of the scratchpad budget between this step's observations.
+                remaining_budget = self.app_settings.AGENT_SCRATCHPAD_MAX_TOKENS - scratchpad_tokens
+                max_tokens = max(
+                    self.MIN_OBSERVATION_TOKENS,
+                    min(self.app_settings.AGENT_OBSERVATION_MAX_TOKENS, remaining_budget // (len(tool_calls) - index))
+                )
+                compacted = self.compact_observation(observation_result, max_tokens)
+                if compacted in seen_observations:
+                    compacted = f"Same result as tool call {seen_observations[compacted]}."
+                else:
+                    seen_observations[compacted] = tool_call["id"]
+
+                scratchpad_tokens += estimate_tokens(compacted)
+                messages = messages.add("tool", compacted, tool_call_id=tool_call["id"])
+            usable_results = [
+                observation_result for observation_result in observations
+                if observation_result and not self.TOOL_FAILURE_PATTERN.match(observation_result.strip())
+            ]
+            if usable_results:
+                partial_results = usable_results
+
+        if partial_results and (deadline.expired() or step_failed):
+            final_answer = self.partial_answer(partial_results)
+        else:
+            final_answer = "I'm sorry, but I couldn't find a final answer."
+        tracer.emit("final_answer", content=final_answer, partial=True)
+        return final_answer
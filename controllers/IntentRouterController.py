@@ -0,0 +1,233 @@
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+from enum import Enum
+from typing import Optional, Set, Tuple
+
+from prometheus_client import Counter
+
+from .BaseController import BaseController
+
+
+INTENT_ROUTER_DECISIONS = Counter(
+    "intent_router_decisions_total",
+    "Intent router decisions, by intent and whether the agent was skipped.",
+    ["intent", "fast_path"]
+)
+
+
+class IntentEnums(Enum):
+    SQL = "sql"
+    CHAT = "chat"
+    AGENT = "agent"
+
+
+class LinearIntentClassifier:
+    """
+    A tiny bag-of-words linear classifier (softmax over per-token weights).
+    The model is a JSON file:
+        {"labels": ["sql", "chat", "agent"],
+         "bias": {"sql": 0.1, ...},
+         "weights": {"price": {"sql": 1.2, "chat": -0.4}, ...}}
+    """
+
+    TOKEN_PATTERN = re.compile(r"[a-z0-9$]+(?:-[a-z0-9]+)*")
+
+    def __init__(self, model_path: str):
+        with open(model_path, "r", encoding="utf-8") as model_file:
+            model = json.load(model_file)
+
+        self.labels = model["labels"]
+        self.bias = model.get("bias", {})
+        self.weights = model.get("weights", {})
+
+    def predict(self, text: str, extra_features: Set[str] = None) -> Tuple[str, float]:
+        """
+        :param text: The user's message.
+        :param extra_features: Additional feature names (e.g. "__catalog__") to score.
+        :return: The most likely label and its probability.
+        """
+        features = set(self.TOKEN_PATTERN.findall(text.lower())) | (extra_features or set())
+        scores = {label: self.bias.get(label, 0.0) for label in self.labels}
+        for feature in features:
+            for label, weight in self.weights.get(feature, {}).items():
+                if label in scores:
+                    scores[label] += weight
+
+        max_score = max(scores.values())
+        exp_scores = {label: math.exp(score - max_score) for label, score in scores.items()}
+        total = sum(exp_scores.values())
+        label = max(exp_scores, key=exp_scores.get)
+        return label, exp_scores[label] / total
+
+
+class IntentRouterController(BaseController):
+    """
+    A local, network-free router that runs before the ReAct agent.
+    Keyword/regex rules over the catalog vocabulary (brands and model names from
+    DATABASE_SQL), optionally backed by a tiny linear classifier, send obvious SQL,
+    catalog-lookup and chit-chat messages straight to their handler. Anything
+    ambiguous (or referring to earlier turns or the uploaded image) goes to the agent.
+    """
+
+    CHIT_CHAT_PATTERN = re.compile(
+        r"^\s*(hi|hello|hey|hiya|salam|salaam|marhaba|good (morning|afternoon|evening)|"
+        r"thanks?( you)?( so much| a lot)?|thank u|thx|ok(ay)?|great|cool|bye|goodbye|see you)"
+        r"[\s!.,?]*$",
+        re.IGNORECASE
+    )
+
+    # Messages that depend on earlier turns or on the uploaded image need the agent's context.
+    CONTEXT_PATTERN = re.compile(
+        r"\b(it|its|this|that|these|those|them|they|above|previous|same|"
+        r"first one|second one|last one|image|picture|photo)\b",
+        re.IGNORECASE
+    )
+
+    # Phrasings that ask for data: prices, counts, rankings, filters, listings. Most of them
+    # are ordinary English ("show me how to...", "how many miles..."), so they only route
+    # confidently together with a catalog value or a car topic.
+    RETRIEVAL_PATTERNS = [
+        re.compile(pattern, re.IGNORECASE)
+        for pattern in (
+            r"\b(price|prices|priced|cost|costs|cheap|cheaper|cheapest|expensive|budget|afford|\$\s?\d)",
+            r"\b(average|avg|mean|median|how many|count|number of|total|sum)\b",
+            r"\b(highest|lowest|fastest|slowest|newest|oldest|most|least|top \d+|maximum|minimum|max|min)\b",
+            r"\b(under|below|above|over|less than|more than|between)\s+\$?\d[\d,.]*k?\b"
+            r"(?!\s*(years?|months?|weeks?|days?|hours?|miles?|km|kilometers?)\b)",
+            r"\b(list|show|find|what cars|which cars|available|in stock)\b",
+        )
+    ]
+
+    # Car topics, the anchors that make a retrieval phrasing about the catalog. On their own
+    # they are just as likely in conceptual questions ("How does a hybrid engine work?").
+    TOPIC_PATTERNS = [
+        re.compile(pattern, re.IGNORECASE)
+        for pattern in (
+            r"\b(mpg|horsepower|hp|torque|displacement|cylinders?|engine|drivetrain|awd|fwd|rwd|4wd|gearbox|transmission)\b",
+            r"\b(hybrid|diesel|petrol|gas|sedan|suv|hatchback|coupe|convertible|wagon|truck|van)s?\b",
+            r"\b(compare|comparison|vs\.?|versus|difference between)\b",
+            r"\b(models?|brands?|trims?|catalog|inventory)\b",
+        )
+    ]
+
+    # Model names that are also everyday words (Lexus "IS", Honda "Fit", Ford "Edge", ...)
+    # would make ordinary sentences look like catalog lookups.
+    AMBIGUOUS_TERMS = {
+        "is", "es", "fit", "edge", "express", "flying", "grand", "land", "range", "formula",
+        "john", "dawn", "ghost", "santa", "compass", "legacy", "transit", "martin", "hardtop",
+        "convertible", "continental", "titan", "phantom", "pilot", "passport", "insight",
+        "ascent", "atlas", "discovery", "explorer", "expedition", "navigator", "voyager",
+        "cooper", "mini", "gt", "cx", "mx", "hr", "gr", "rx", "nx",
+    }
+
+    def __init__(self):
+        super().__init__()
+
+        self.logger = logging.getLogger(__name__)
+        self.confidence_threshold = self.app_settings.INTENT_ROUTER_THRESHOLD
+
+        self.catalog_terms = self.load_catalog_terms()
+        self.catalog_pattern = self.compile_catalog_pattern(self.catalog_terms)
+
+        self.classifier: Optional[LinearIntentClassifier] = None
+        model_path = self.app_settings.INTENT_ROUTER_MODEL_PATH
+        if model_path:
+            try:
+                self.classifier = LinearIntentClassifier(model_path)
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.error(f"Could not load intent classifier from {model_path}: {e}")
+
+    def load_catalog_terms(self) -> Set[str]:
+        """
+        Reads brand names and the leading word of each model name from the car database.
+        :return: A set of lower-cased catalog terms (e.g. "honda", "land rover", "accord", "cr-v").
+        """
+        database_sql_path = self.get_database_sql_path(db_name=self.app_settings.DATABASE_SQL)
+        if not os.path.exists(database_sql_path):
+            self.logger.warning(f"Car database not found at {database_sql_path}; catalog routing disabled.")
+            return set()
+
+        terms = set()
+        try:
+            connection = sqlite3.connect(f"file:{database_sql_path}?mode=ro", uri=True)
+            try:
+                for brand, model_number in connection.execute(
+                    "SELECT DISTINCT Brand, Model_Number FROM cars"
+                ):
+                    if brand:
+                        terms.add(brand.strip().lower())
+                    if model_number:
+                        model_name = model_number.split()[0].strip().lower()
+                        if len(model_name) > 1 and not model_name.isdigit():
+                            terms.add(model_name)
+                terms -= self.AMBIGUOUS_TERMS
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            self.logger.error(f"Could not read catalog vocabulary: {e}")
+
+        return terms
+
+    @staticmethod
+    def compile_catalog_pattern(terms: Set[str]):
+        if not terms:
+            return None
+        # Longest terms first so "land rover" wins over "land".
+        alternatives = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+        return re.compile(rf"(?<![\w-])({alternatives})(?![\w-])", re.IGNORECASE)
+
+    def route(self, user_prompt: str, has_history: bool = False, has_image: bool = False) -> Tuple[str, float]:
+        """
+        Decide which handler should answer the message, without any network call.
+
+        :param user_prompt: The user's message.
+        :param has_history: Whether the conversation has earlier turns.
+        :param has_image: Whether image details are attached to the conversation.
+        :return: The intent value ("sql", "chat" or "agent") and a confidence between 0 and 1.
+        """
+        text = user_prompt.strip()
+        if not text:
+            return IntentEnums.AGENT.value, 0.0
+
+        if self.CHIT_CHAT_PATTERN.match(text):
+            return IntentEnums.CHAT.value, 0.95
+
+        if (has_history or has_image) and self.CONTEXT_PATTERN.search(text):
+            return IntentEnums.AGENT.value, 1.0
+
+        mentions_catalog = bool(self.catalog_pattern and self.catalog_pattern.search(text))
+        retrieval_hits = sum(1 for pattern in self.RETRIEVAL_PATTERNS if pattern.search(text))
+        topic_hits = sum(1 for pattern in self.TOPIC_PATTERNS if pattern.search(text))
+
+        # A confident SQL route needs a data-retrieval phrasing anchored to a catalog value
+        # or a car topic; either one alone stays below the threshold and goes to the agent
+        # (or to the classifier, when there is one).
+        if retrieval_hits and mentions_catalog:
+            intent, confidence = IntentEnums.SQL.value, 0.95
+        elif retrieval_hits and topic_hits:
+            intent, confidence = IntentEnums.SQL.value, 0.85
+        elif mentions_catalog:
+            # e.g. "I want a BMW", but also "My Toyota makes a weird noise".
+            intent, confidence = IntentEnums.SQL.value, 0.7
+        elif retrieval_hits or topic_hits:
+            intent, confidence = IntentEnums.SQL.value, 0.6
+        else:
+            intent, confidence = IntentEnums.AGENT.value, 0.0
+
+        if self.classifier and confidence < self.confidence_threshold:
+            extra_features = {"__catalog__"} if mentions_catalog else set()
+            label, probability = self.classifier.predict(text, extra_features=extra_features)
+            if probability > confidence:
+                intent, confidence = label, probability
+
+        return intent, confidence
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= self.confidence_threshold
+
+    def record_decision(self, intent: str, fast_path: bool) -> None:
+        INTENT_ROUTER_DECISIONS.labels(intent=intent, fast_path=str(fast_path).lower()).inc()
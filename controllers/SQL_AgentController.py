@@ -1,77 +1,390 @@
+import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
 from .BaseController import BaseController
-from stores.llm.LLMProviderFactory import LLMProviderFactory
 from stores.llm.PromptTemplate import get_prompt_template
-from operator import itemgetter
+from stores.sqldb import SchemaContext, SQLiteExecutor, SQLQueryCache, QueryGuard, QueryRejected, ResultFormatter
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnablePassthrough, RunnableLambda
-from langchain_community.utilities import SQLDatabase
-from langchain_community.tools.sql_database.tool import QuerySQLDataBaseTool
-from langchain.chains import create_sql_query_chain
-from langchain_community.agent_toolkits import create_sql_agent
-import re
-import os
+from langchain_core.runnables import RunnableLambda
+from prometheus_client import Counter, Gauge
+import json
+
+SQL_ANSWER_MODES = Counter(
+    "sql_answer_mode_total",
+    "SQL answers by how they were produced (formatted, structured or llm).",
+    ["mode"]
+)
+SQL_ASYNC_QUEUE_DEPTH = Gauge(
+    "sql_async_queue_depth",
+    "Async SQL questions waiting for a free slot."
+)
+SQL_ASYNC_IN_FLIGHT = Gauge(
+    "sql_async_in_flight",
+    "Async SQL questions currently being answered."
+)
+SQL_ASYNC_REJECTIONS = Counter(
+    "sql_async_rejections_total",
+    "Async SQL questions turned away because too many were already waiting."
+)
+
+
+class SQLAgentBusy(RuntimeError):
+    """
+    Raised by the async SQL path when too many questions are already waiting.
+    """
 
 
 class SQL_AgentController(BaseController):
-    
-    def __init__(self , llm):
+    """
+    Answers questions from the car database: the LLM writes a SQL query, the query is
+    executed, and the LLM phrases the result. The chains are built once, on first use,
+    and rebuilt only when the database file changes. SQL that ran successfully is
+    cached per question, so repeat questions skip the query-writing LLM call.
+
+    Simple results (a single value, one row or a small table) are formatted directly,
+    and the agent can ask for the structured result instead of a phrased answer; both
+    skip the answer-phrasing LLM call.
+
+    achat_agent_with_sql() is the async variant: the LLM steps use ainvoke and the
+    database work runs on a small dedicated thread pool, with a bound on concurrent
+    and waiting questions, so a slow question never blocks the event loop.
+    """
+
+    # Default row limit the query prompt asks for.
+    TOP_K: int = 5
+
+    def __init__(self , llm, embed=None):
+        """
+        :param llm: The LangChain chat model that writes the SQL and phrases the answer.
+        :param embed: Optional text embedding function, enabling similar-question cache hits.
+        """
         super().__init__()
-        
 
-        # Initialize the Prompt Template 
+
+        # Initialize the Prompt Template
         self.prompt_template = get_prompt_template()
-        
+
         self.llm = llm
         # Path to your database (db sql)
         self.database_sql_path = self.get_database_sql_path(db_name=self.app_settings.DATABASE_SQL)
-        
-
-        
-    def chat_agent_with_sql(self, message: str) -> str:
-        # Helper function to remove unwanted prefixes and markdown formatting from SQL output.
-        def remove_markdown(sql_text: str) -> str:
-            # Remove common unwanted prefixes and markdown delimiters.
-            for prefix in ["SQLQuery:", "```sql", "```"]:
-                sql_text = sql_text.replace(prefix, "")
-            return sql_text.strip()
-
-        # Create a runnable lambda to apply the cleaning function.
-        self.remove_markdown_runnable = RunnableLambda(remove_markdown)
-        
-        # Generate the prompt for the SQL agent.
-        # Ensure that your  returns a string template instructing the model to output only a valid SQL query.
-        self.prompt = self.prompt_template.sql_agent_prompt()
-        self.answer_prompt = PromptTemplate.from_template(self.prompt)
-        
-        # Setup the SQL database connection.
-        self.db = SQLDatabase.from_uri(f"sqlite:///{self.database_sql_path}")
-        
-        # Setup the tool to execute SQL queries.
-        self.execute_query = QuerySQLDataBaseTool(db=self.db)
-        
-        # Create a chain to generate the SQL query.
-        write_query = create_sql_query_chain(self.llm, self.db)
-        
-        # Define the final chain: generate the query, remove extra text/markdown, execute the query, then use the LLM
-        # to generate the final answer.
-        self.answer = self.answer_prompt | self.llm | StrOutputParser()
-        self.chain = (
-            RunnablePassthrough.assign(query=write_query | self.remove_markdown_runnable)
-            .assign(result=itemgetter("query") | self.execute_query)
-            | self.answer
+
+        # Compact schema description for the query prompt, cached per database version.
+        self.schema_context = SchemaContext(self.database_sql_path)
+
+        # Pooled read-only connections that run the generated SQL within time and size limits.
+        self.sql_executor = SQLiteExecutor(
+            self.database_sql_path,
+            pool_size=self.app_settings.SQL_POOL_SIZE,
+            timeout_seconds=self.app_settings.SQL_QUERY_TIMEOUT_SECONDS,
+            max_rows=self.app_settings.SQL_MAX_ROWS,
+            max_bytes=self.app_settings.SQL_MAX_RESULT_BYTES,
+            mmap_size_bytes=self.app_settings.SQL_MMAP_SIZE_BYTES,
+            cache_size_kb=self.app_settings.SQL_CACHE_SIZE_KB,
+            in_memory=self.app_settings.SQL_IN_MEMORY_REPLICA
+        )
+
+        # Pre-execution checks: SELECT only, no runaway plans, always a LIMIT.
+        self.query_guard = None
+        if self.app_settings.SQL_GUARD_ENABLED:
+            self.query_guard = QueryGuard(
+                self.sql_executor,
+                max_rows=self.app_settings.SQL_MAX_ROWS,
+                max_scan_rows=self.app_settings.SQL_GUARD_MAX_SCAN_ROWS
+            )
+
+        # Generated SQL by normalized question, cleared when the database changes.
+        self.query_cache = None
+        if self.app_settings.NL_TO_SQL_CACHE_ENABLED:
+            self.query_cache = SQLQueryCache(
+                max_entries=self.app_settings.NL_TO_SQL_CACHE_MAX_ENTRIES,
+                ttl_seconds=self.app_settings.NL_TO_SQL_CACHE_TTL_SECONDS,
+                embed=embed,
+                similarity_threshold=self.app_settings.NL_TO_SQL_SIMILARITY_THRESHOLD
+            )
+
+        # Deterministic answers for simple results, instead of the answer-phrasing LLM call.
+        self.result_formatter = ResultFormatter() if self.app_settings.SQL_DIRECT_FORMATTING else None
+
+        # The async path: database work (cache lookups, guard, query) runs on its own bounded
+        # pool, and a semaphore limits how many questions are answered at once.
+        self.db_executor = ThreadPoolExecutor(
+            max_workers=self.app_settings.SQL_POOL_SIZE,
+            thread_name_prefix="sql-db"
+        )
+        self.async_slots = asyncio.Semaphore(self.app_settings.SQL_ASYNC_MAX_CONCURRENCY)
+        self.async_waiting = 0
+
+        # Built lazily by get_chain() and shared by all callers.
+        self.chain = None
+        self.chain_version = None
+        self.chain_lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+
+    def catalog_version(self) -> str:
+        """
+        Returns a version string for the car database that changes whenever the file is replaced or modified.
+        """
+        return self.schema_context.version()
+
+    @staticmethod
+    def remove_markdown(sql_text: str) -> str:
+        """
+        Removes unwanted prefixes and markdown formatting from the generated SQL.
+        """
+        for prefix in ["SQLQuery:", "```sql", "```"]:
+            sql_text = sql_text.replace(prefix, "")
+        return sql_text.strip()
+
+    def build_chain(self):
+        """
+        Builds the two LLM steps of the SQL flow: the query writer (question -> SQL) and
+        the answer chain (question, query and result -> answer). The query itself runs on
+        the read-only pool in between.
+        :return: A (write_query, answer) pair of runnables.
+        """
+        # Create a chain to generate the SQL query from the precomputed schema context,
+        # instead of reflecting the schema and sampling rows on every question.
+        query_prompt = PromptTemplate.from_template(self.prompt_template.sql_query_prompt()).partial(
+            schema=self.schema_context.get(),
+            top_k=str(self.TOP_K)
+        )
+        write_query = (
+            query_prompt
+            | self.llm.bind(stop=["\nSQLResult:"])
+            | StrOutputParser()
+            | RunnableLambda(self.remove_markdown)
+        )
+
+        answer_prompt = PromptTemplate.from_template(self.prompt_template.sql_agent_prompt())
+        answer = answer_prompt | self.llm | StrOutputParser()
+
+        return write_query, answer
+
+    def refresh(self) -> None:
+        """
+        Rebuilds the database handle and the chain, e.g. after the database file was replaced.
+        """
+        with self.chain_lock:
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        # Must be called with chain_lock held.
+        version = self.catalog_version()
+        self.chain = self.build_chain()
+        self.chain_version = version
+        self.logger.info(f"SQL chain built for database version {version}.")
+
+    def get_chain(self):
+        """
+        Returns the shared (write_query, answer) chains, building them on first use or
+        when the database file has changed.
+        """
+        chain, version = self.chain, self.catalog_version()
+        if chain is not None and self.chain_version == version:
+            return chain
+
+        with self.chain_lock:
+            # Another thread may have rebuilt it while we waited.
+            if self.chain is None or self.chain_version != version:
+                self.rebuild()
+            return self.chain
+
+    def check_and_run(self, query: str):
+        """
+        Checks the query with the query guard (if enabled) and executes it.
+        :return: The (query, result) pair, with the result as returned by SQLiteExecutor.query().
+        :raises QueryRejected: If the guard rejects the query.
+        """
+        if self.query_guard is not None:
+            query = self.query_guard.check(query)
+        return query, self.sql_executor.query(query)
+
+    @staticmethod
+    def retry_question(message: str, hint: str) -> str:
+        return f"{message}\n(A previous query was rejected: {hint} Write a different query.)"
+
+    @staticmethod
+    def rejected_result(hint: str) -> dict:
+        error = f"the generated query was rejected: {hint}"
+        return {"columns": [], "rows": [], "truncated": False, "error": error}
+
+    def write_and_run_query(self, write_query, message: str):
+        """
+        Generates the query, checks it with the query guard and executes it. A rejected
+        query goes back to the model once, with the reason as a hint.
+        :return: The (query, result) pair, with the result as returned by SQLiteExecutor.query();
+            its error is set if the query was rejected twice.
+        """
+        question, hint = message, None
+        for attempt in range(2):
+            query = write_query.invoke({"question": question})
+            try:
+                return self.check_and_run(query)
+            except QueryRejected as e:
+                self.logger.warning(f"Generated SQL rejected ({e.reason}): {query}")
+                hint = e.hint
+                question = self.retry_question(message, hint)
+
+        return query, self.rejected_result(hint)
+
+    async def awrite_and_run_query(self, write_query, message: str):
+        """
+        Async variant of write_and_run_query(): the query is written with ainvoke and
+        checked and executed on db_executor.
+        """
+        loop = asyncio.get_running_loop()
+        question, hint = message, None
+        for attempt in range(2):
+            query = await write_query.ainvoke({"question": question})
+            try:
+                return await loop.run_in_executor(self.db_executor, self.check_and_run, query)
+            except QueryRejected as e:
+                self.logger.warning(f"Generated SQL rejected ({e.reason}): {query}")
+                hint = e.hint
+                question = self.retry_question(message, hint)
+
+        return query, self.rejected_result(hint)
+
+    @staticmethod
+    def structured_result(query: str, result: dict) -> str:
+        """
+        Renders the result as compact JSON for the agent, which phrases the final answer itself.
+        """
+        if result["error"]:
+            return SQLiteExecutor.render(result)
+        return json.dumps(
+            {
+                "query": query,
+                "columns": result["columns"],
+                "rows": [list(row) for row in result["rows"]],
+                "truncated": result["truncated"],
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str
         )
-        
-        # Invoke the chain with the user's question.
-        self.response = self.chain.invoke({"question": message})
-        
-        return self.response
-    
 
-        
-        
+    def lookup_query(self, message: str, version: str):
+        return self.query_cache.lookup(message, version) if self.query_cache else None
+
+    def remember_query(self, message: str, version: str, query: str, result: dict, cached: bool) -> None:
+        # Only SQL that executed successfully is worth reusing.
+        if self.query_cache and not cached and not result["error"]:
+            self.query_cache.store(message, version, query)
+
+    def answer_without_llm(self, query: str, result: dict, structured: bool):
+        """
+        :return: The structured result or the directly formatted answer, or None if the
+            answer-phrasing LLM call is needed.
+        """
+        if structured:
+            SQL_ANSWER_MODES.labels(mode="structured").inc()
+            return self.structured_result(query, result)
+
+        if self.result_formatter is not None:
+            formatted = self.result_formatter.format(result, query)
+            if formatted is not None:
+                SQL_ANSWER_MODES.labels(mode="formatted").inc()
+                return formatted
+
+        SQL_ANSWER_MODES.labels(mode="llm").inc()
+        return None
+
+    def chat_agent_with_sql(self, message: str, structured: bool = False) -> str:
+        """
+        :param message: The user's question.
+        :param structured: Return the query and its rows as JSON instead of a phrased answer.
+        :return: The answer, or the structured result.
+        """
+        return self.answer_question(message, structured)[0]
+
+    def answer_question(self, message: str, structured: bool = False) -> Tuple[str, bool]:
+        """
+        Same as chat_agent_with_sql(), but also tells whether the query ran successfully.
+        :return: The (response, succeeded) pair; a response built from a failed or rejected
+            query is not worth caching.
+        """
+        # The chains are stateless between calls, so several tool calls can invoke them concurrently.
+        write_query, answer = self.get_chain()
+        version = self.catalog_version()
+
+        query = self.lookup_query(message, version)
+        cached = query is not None
+        if cached:
+            result = self.sql_executor.query(query)
+        else:
+            query, result = self.write_and_run_query(write_query, message)
+        self.remember_query(message, version, query, result, cached)
+
+        succeeded = not result["error"]
+        response = self.answer_without_llm(query, result, structured)
+        if response is not None:
+            return response, succeeded
+        response = answer.invoke({"question": message, "query": query, "result": SQLiteExecutor.render(result)})
+        return response, succeeded
+
+    async def achat_agent_with_sql(self, message: str, structured: bool = False) -> str:
+        """
+        Async variant of chat_agent_with_sql().
+
+        :param message: The user's question.
+        :param structured: Return the query and its rows as JSON instead of a phrased answer.
+        :return: The answer, or the structured result.
+        :raises SQLAgentBusy: If too many questions are already waiting.
+        """
+        return (await self.aanswer_question(message, structured))[0]
+
+    async def aanswer_question(self, message: str, structured: bool = False) -> Tuple[str, bool]:
+        """
+        Async variant of answer_question(). At most SQL_ASYNC_MAX_CONCURRENCY questions
+        are answered at once; when SQL_ASYNC_MAX_QUEUE more are already waiting, the
+        question is turned away immediately instead of queueing without bound.
+
+        :return: The (response, succeeded) pair.
+        :raises SQLAgentBusy: If too many questions are already waiting.
+        """
+        if self.async_waiting >= self.app_settings.SQL_ASYNC_MAX_QUEUE:
+            SQL_ASYNC_REJECTIONS.inc()
+            self.logger.warning("Async SQL queue is full; turning a question away.")
+            raise SQLAgentBusy("Too many SQL questions are waiting.")
+
+        self.async_waiting += 1
+        SQL_ASYNC_QUEUE_DEPTH.inc()
+        try:
+            await self.async_slots.acquire()
+        finally:
+            self.async_waiting -= 1
+            SQL_ASYNC_QUEUE_DEPTH.dec()
+
+        SQL_ASYNC_IN_FLIGHT.inc()
+        try:
+            return await self.answer_with_sql_async(message, structured)
+        finally:
+            SQL_ASYNC_IN_FLIGHT.dec()
+            self.async_slots.release()
 
-        
+    async def answer_with_sql_async(self, message: str, structured: bool) -> Tuple[str, bool]:
+        loop = asyncio.get_running_loop()
+        # get_chain() may reflect the schema on first use or after a database change.
+        write_query, answer = await loop.run_in_executor(self.db_executor, self.get_chain)
+        version = self.catalog_version()
 
+        # The lookup may embed the question, a blocking call.
+        query = await loop.run_in_executor(self.db_executor, self.lookup_query, message, version)
+        cached = query is not None
+        if cached:
+            result = await loop.run_in_executor(self.db_executor, self.sql_executor.query, query)
+        else:
+            query, result = await self.awrite_and_run_query(write_query, message)
+        await loop.run_in_executor(self.db_executor, self.remember_query, message, version, query, result, cached)
 
+        succeeded = not result["error"]
+        response = self.answer_without_llm(query, result, structured)
+        if response is not None:
+            return response, succeeded
+        response = await answer.ainvoke({"question": message, "query": query, "result": SQLiteExecutor.render(result)})
+        return response, succeeded
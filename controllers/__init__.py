@@ -1,5 +1,7 @@
 from .ProcessController import ProcessController
 from .RAGController import RAGController
+from .CatalogBuildController import CatalogBuildController
 from .SQL_AgentController import SQL_AgentController
+from .IntentRouterController import IntentRouterController
 from .ChatbotController import ChatbotController
 
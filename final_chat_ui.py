@@ -1,5 +1,5 @@
 import streamlit as st
-from controllers import SQL_AgentController
+from controllers import SQL_AgentController, IntentRouterController
 from helpers.config import get_settings
 from stores.llm.LLMProviderFactory import LLMProviderFactory
 from stores.llm.PromptTemplate import get_prompt_template
@@ -34,6 +34,9 @@ llm_sql = text_generation_client_sql.LLM_CHAT()
 # Initialize the SQL Agent Controller
 sql_agent = SQL_AgentController(llm_sql)
 
+# Local intent router (no network calls) tried before the LLM classifier
+intent_router = IntentRouterController()
+
 
 # Configure the Streamlit page
 
@@ -50,7 +53,12 @@ st.title("🚗 Car Assistant Chatbot")
 def decide_mode_llm(user_query: str) -> str:
     """
     Classify the user's query into one of two modes: 'sql' or 'chat'.
+    The local intent router answers confident cases; only the rest cost an LLM call.
     """
+    intent, confidence = intent_router.route(user_query)
+    if intent_router.is_confident(confidence) and intent in ("sql", "chat"):
+        return intent
+
     try:
         classification_raw = text_generation_client_classification.generate_text(
             prompt_template.get_classification_prompt(user_query)
@@ -1,4 +1,5 @@
-from controllers import RAGController
+from controllers import CatalogBuildController
 
-rag_o = RAGController(em=True)
-di = rag_o.index_into_vector_db()
\ No newline at end of file
+# Rebuild the SQLite catalog and the vector collection from the same CSV (DATASET).
+catalog_builder = CatalogBuildController()
+di = catalog_builder.build_all()
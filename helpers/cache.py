@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from prometheus_client import Counter
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "In-process cache lookups, by cache and result (hit or miss).",
+    ["cache", "result"]
+)
+
+
+class TTLCache:
+    """
+    A thread-safe in-process LRU cache whose entries also expire after a fixed time.
+    """
+
+    def __init__(self, name: str, max_entries: int = 512, ttl_seconds: Optional[float] = None):
+        """
+        :param name: The cache name, used as the metrics label.
+        :param max_entries: Maximum number of entries; the least recently used one is evicted first.
+        :param ttl_seconds: Lifetime of an entry in seconds, or None to keep entries until evicted.
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        :return: The cached value, or `default` if the key is missing or expired.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                self.entries.move_to_end(key)
+                CACHE_REQUESTS.labels(cache=self.name, result="hit").inc()
+                return entry[0]
+            if entry is not None:
+                del self.entries[key]
+
+        CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+        return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 #from pydantic import BaseSettings, SettingsConfigDict
 
@@ -33,6 +34,77 @@ class Settings(BaseSettings):
     SQL_BACKEND :str
     SQL_MODEL_ID :str
 
+    HEDGE_BACKENDS: str = "GROQ,OPENAI"
+    HEDGE_GENERATION_MODEL_IDS: Optional[str] = None
+    HEDGE_VISION_MODEL_IDS: Optional[str] = None
+    HEDGE_LATENCY_PERCENTILE: float = 95.0
+    HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 3
+    CIRCUIT_BREAKER_RESET_SECONDS: float = 30.0
+
+    LLM_LOG_SAMPLE_RATE: float = 0.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 20.0
+
+    REPLAY_MODE: str = "replay"
+    REPLAY_BACKEND: Optional[str] = None
+    REPLAY_FILE: str = "llm_replay.jsonl"
+    REPLAY_LATENCY_SCALE: float = 0.0
+
+    AGENT_TOOL_MAX_WORKERS: int = 4
+    AGENT_MAX_ITERATIONS: int = 3
+    AGENT_REQUEST_TIMEOUT_SECONDS: float = 45.0
+    AGENT_TOOL_STEP_MAX_TOKENS: int = 256
+    AGENT_ANSWER_MAX_TOKENS: int = 1000
+    AGENT_OBSERVATION_MAX_TOKENS: int = 400
+    AGENT_SCRATCHPAD_MAX_TOKENS: int = 1500
+
+    SQL_POOL_SIZE: int = 4
+    SQL_QUERY_TIMEOUT_SECONDS: float = 5.0
+    SQL_MAX_ROWS: int = 50
+    SQL_MAX_RESULT_BYTES: int = 8000
+    SQL_MMAP_SIZE_BYTES: int = 268435456
+    SQL_CACHE_SIZE_KB: int = 65536
+    SQL_IN_MEMORY_REPLICA: bool = False
+    SQL_GUARD_ENABLED: bool = True
+    SQL_GUARD_MAX_SCAN_ROWS: int = 200000
+    SQL_DIRECT_FORMATTING: bool = True
+    SQL_RETURN_STRUCTURED_TO_AGENT: bool = False
+    SQL_ASYNC_ENABLED: bool = True
+    SQL_ASYNC_MAX_CONCURRENCY: int = 8
+    SQL_ASYNC_MAX_QUEUE: int = 32
+
+    NL_TO_SQL_CACHE_ENABLED: bool = True
+    NL_TO_SQL_CACHE_MAX_ENTRIES: int = 1024
+    NL_TO_SQL_CACHE_TTL_SECONDS: float = 86400.0
+    NL_TO_SQL_SIMILARITY_ENABLED: bool = False
+    NL_TO_SQL_SIMILARITY_THRESHOLD: float = 0.95
+
+    TOOL_CACHE_ENABLED: bool = True
+    TOOL_CACHE_MAX_ENTRIES: int = 512
+    TOOL_CACHE_TTL_SECONDS: float = 3600.0
+
+    CONVERSATION_STORE_BACKEND: str = "MEMORY"
+    CONVERSATION_MAX_SESSIONS: int = 10000
+    CONVERSATION_TTL_SECONDS: float = 86400.0
+    CONVERSATION_SQLITE_FILE: str = "conversations.db"
+    CONVERSATION_REDIS_URL: str = "redis://localhost:6379/0"
+    CONVERSATION_WINDOW_MAX_TURNS: int = 6
+    CONVERSATION_WINDOW_MAX_TOKENS: int = 1500
+    CONVERSATION_MAX_STORED_TURNS: int = 50
+    CONVERSATION_SUMMARY_ENABLED: bool = True
+    CONVERSATION_SUMMARY_BACKEND: Optional[str] = None
+    CONVERSATION_SUMMARY_MODEL_ID: Optional[str] = None
+    CONVERSATION_SUMMARY_MIN_TURNS: int = 2
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = 300
+    CONVERSATION_SUMMARY_MAX_INPUT_TOKENS: int = 3000
+
+    CHAT_IDEMPOTENCY_MAX_ENTRIES: int = 10000
+    CHAT_IDEMPOTENCY_TTL_SECONDS: float = 600.0
+
+    INTENT_ROUTER_ENABLED: bool = True
+    INTENT_ROUTER_THRESHOLD: float = 0.8
+    INTENT_ROUTER_MODEL_PATH: Optional[str] = None
+
     class Config:
         env_file = ".env"
 
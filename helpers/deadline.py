@@ -0,0 +1,53 @@
+import time
+from typing import Optional
+
+from prometheus_client import Counter
+
+DEADLINE_EXHAUSTED = Counter(
+    "agent_deadline_exhausted_total",
+    "Requests whose time budget ran out, by the stage that was cut short.",
+    ["stage"]
+)
+
+
+class Deadline:
+    """
+    A request-wide time budget, passed down through the agent, its tools,
+    the SQL chain and the provider calls.
+    A deadline created without a timeout never expires.
+    """
+
+    def __init__(self, timeout_seconds: Optional[float] = None):
+        """
+        :param timeout_seconds: The total budget in seconds, or None for no limit.
+        """
+        self.expires_at = time.monotonic() + timeout_seconds if timeout_seconds else None
+
+    def remaining(self) -> Optional[float]:
+        """
+        :return: Seconds left (never negative), or None if there is no limit.
+        """
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, cap: Optional[float] = None) -> Optional[float]:
+        """
+        Returns the timeout to use for a single step: the remaining budget, capped.
+        :param cap: An upper bound for the step (e.g. the per-request provider timeout).
+        :return: The step timeout in seconds, or None if neither bound is set.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        if cap is None:
+            return remaining
+        return min(remaining, cap)
+
+    @staticmethod
+    def record_exhausted(stage: str) -> None:
+        DEADLINE_EXHAUSTED.labels(stage=stage).inc()
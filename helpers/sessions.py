@@ -0,0 +1,98 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from prometheus_client import Counter
+
+from helpers.cache import TTLCache
+
+IDEMPOTENT_REQUESTS = Counter(
+    "chat_idempotent_requests_total",
+    "Requests carrying an Idempotency-Key, by result (completed_hit, in_flight_hit or miss).",
+    ["result"]
+)
+
+
+class SessionGate:
+    """
+    Serializes the requests of one session and deduplicates retried requests, within
+    one worker process (run it on the event loop thread only).
+
+    - Requests for the same session run one at a time, so the read-modify-write of its
+      conversation cannot interleave. Locks exist only while a request holds or waits for them.
+    - A request with an idempotency key runs as its own task: a retry with the same key
+      awaits that task if it is still running, or gets its result if it finished less
+      than `ttl_seconds` ago, instead of recomputing it. A client that disconnects does
+      not cancel the work its retry will wait for.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 600.0):
+        """
+        :param max_entries: Maximum number of completed results kept for retries.
+        :param ttl_seconds: How long a completed result is returned to retries.
+        """
+        self.locks: Dict[Hashable, list] = {}
+        self.in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.results = TTLCache(name="chat_idempotency", max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    @asynccontextmanager
+    async def lock(self, session_key: Hashable):
+        """
+        Holds the session's lock; the lock is dropped when nobody holds or waits for it.
+        """
+        entry = self.locks.setdefault(session_key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.locks[session_key]
+
+    async def run(
+        self,
+        session_key: Hashable,
+        compute: Callable[[], Awaitable],
+        idempotency_key: Optional[str] = None
+    ):
+        """
+        Runs `compute` under the session's lock, reusing the result of an earlier request
+        with the same idempotency key when there is one.
+
+        :param session_key: Identifies the session, e.g. (session_id, user_id).
+        :param compute: Produces the response; called at most once per idempotency key.
+        :param idempotency_key: The client's Idempotency-Key, if any.
+        :return: The response.
+        """
+        if not idempotency_key:
+            async with self.lock(session_key):
+                return await compute()
+
+        request_key = (session_key, idempotency_key)
+        result = self.results.get(request_key)
+        if result is not None:
+            IDEMPOTENT_REQUESTS.labels(result="completed_hit").inc()
+            return result
+
+        task = self.in_flight.get(request_key)
+        if task is not None:
+            IDEMPOTENT_REQUESTS.labels(result="in_flight_hit").inc()
+        else:
+            IDEMPOTENT_REQUESTS.labels(result="miss").inc()
+            task = asyncio.create_task(self.run_locked(session_key, compute))
+            self.in_flight[request_key] = task
+            task.add_done_callback(lambda done: self.finish(request_key, done))
+
+        # Shielded, so a cancelled request (e.g. a disconnected client) leaves the task running.
+        return await asyncio.shield(task)
+
+    async def run_locked(self, session_key: Hashable, compute: Callable[[], Awaitable]):
+        async with self.lock(session_key):
+            return await compute()
+
+    def finish(self, request_key: Hashable, task: asyncio.Task) -> None:
+        self.in_flight.pop(request_key, None)
+        # Failures are not kept: a retry after an error runs the request again.
+        if not task.cancelled() and task.exception() is None:
+            self.results.set(request_key, task.result())
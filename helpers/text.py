@@ -0,0 +1,127 @@
+import json
+import re
+import unicodedata
+
+# Common abbreviations and spelling variants in car questions.
+QUERY_SYNONYMS = {
+    "avg": "average",
+    "mean": "average",
+    "cars": "car",
+    "prices": "price",
+    "cost": "price",
+    "costs": "price",
+    "hp": "horsepower",
+    "vs": "versus",
+}
+
+# Words that do not change what is being asked.
+QUERY_STOP_WORDS = {
+    "a", "an", "the", "of", "for", "is", "are", "was", "what", "whats", "please",
+    "me", "tell", "show", "give", "can", "you", "could", "i", "to", "do", "does",
+}
+
+
+def normalize_query(text: str) -> str:
+    """
+    Reduces a question to a canonical form for cache keys, so that trivially different
+    phrasings ("Average price of Honda?", "avg price honda") map to the same key.
+    Numbers and the order of the remaining words are kept.
+
+    :param text: The question.
+    :return: The normalized question.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower().replace("'", "").replace("\u2019", "")
+    tokens = re.findall(r"[\w$.\-]+", text)
+
+    normalized = []
+    for token in tokens:
+        token = token.strip(".-")
+        token = QUERY_SYNONYMS.get(token, token)
+        if token and token not in QUERY_STOP_WORDS:
+            normalized.append(token)
+
+    return " ".join(normalized)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (about four characters per token for English text), good enough for budgets.
+    """
+    return (len(text or "") + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cuts the text to roughly `max_tokens` tokens, at a line or word boundary when possible,
+    and says how much was left out.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    max_chars = max(0, max_tokens * 4)
+    cut = text[:max_chars]
+    boundary = max(cut.rfind("\n"), cut.rfind(" "))
+    if boundary > max_chars // 2:
+        cut = cut[:boundary]
+    return f"{cut.rstrip()} ... [{len(text) - len(cut)} more characters omitted]"
+
+
+def compact_structured_rows(text: str, max_tokens: int):
+    """
+    Shrinks a structured SQL result, {"query": ..., "columns": [...], "rows": [[...], ...], ...},
+    to roughly `max_tokens` tokens by keeping only the first rows, so it stays valid JSON.
+    The rows left out are counted in "omitted_rows" and "truncated" is set.
+
+    :return: The compacted JSON, or None if the text is not a structured result.
+    """
+    stripped = (text or "").strip()
+    if not stripped.startswith("{"):
+        return None
+    try:
+        result = json.loads(stripped)
+    except ValueError:
+        return None
+    if not isinstance(result, dict) or not isinstance(result.get("rows"), list):
+        return None
+
+    def dump(kept: int) -> str:
+        compacted = dict(result, rows=result["rows"][:kept])
+        if kept < len(result["rows"]):
+            compacted.update(truncated=True, omitted_rows=len(result["rows"]) - kept)
+        return json.dumps(compacted, ensure_ascii=False, separators=(",", ":"))
+
+    # The most rows that fit the budget.
+    low, high = 0, len(result["rows"])
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(dump(middle)) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return dump(low)
+
+
+def render_structured_rows(text: str, max_rows: int = 10):
+    """
+    Renders a structured SQL result as a header line and one pipe-separated line per row,
+    keeping at most `max_rows` rows.
+
+    :return: The table, or None if the text is not a structured result.
+    """
+    stripped = (text or "").strip()
+    if not stripped.startswith("{"):
+        return None
+    try:
+        result = json.loads(stripped)
+    except ValueError:
+        return None
+    if not isinstance(result, dict) or not isinstance(result.get("rows"), list):
+        return None
+
+    rows = result["rows"]
+    lines = [" | ".join(str(column) for column in result.get("columns") or [])]
+    lines += [" | ".join("" if value is None else str(value) for value in row) for row in rows[:max_rows]]
+    omitted = len(rows) - min(len(rows), max_rows) + int(result.get("omitted_rows") or 0)
+    if omitted or result.get("truncated"):
+        lines.append(f"... ({omitted} more rows)" if omitted else "... (more rows)")
+    return "\n".join(line for line in lines if line)
@@ -0,0 +1,46 @@
+import logging
+import time
+from typing import Callable, Optional
+
+
+class AgentTracer:
+    """
+    Emits structured events while the agent runs (step start, thought, tool call,
+    observation, final answer), each stamped with the time since the request started.
+    A tracer without an `on_event` callback is disabled and every call is a no-op,
+    so requests that nobody is watching pay nothing.
+    """
+
+    def __init__(self, on_event: Optional[Callable[[dict], None]] = None):
+        """
+        :param on_event: Called with each event dict; may be called from tool threads.
+        """
+        self.on_event = on_event
+        self.started_at = time.perf_counter()
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def enabled(self) -> bool:
+        return self.on_event is not None
+
+    def elapsed_ms(self, since: float = None) -> float:
+        """
+        :param since: A time.perf_counter() value; defaults to the start of the request.
+        :return: Milliseconds elapsed since then.
+        """
+        return round((time.perf_counter() - (since or self.started_at)) * 1000, 1)
+
+    def emit(self, event_type: str, **fields) -> None:
+        """
+        Sends one event to the subscriber. A failing subscriber never breaks the agent.
+        :param event_type: The event name, e.g. "step_start" or "observation".
+        :param fields: The event payload.
+        """
+        if self.on_event is None:
+            return
+
+        event = {"type": event_type, "elapsed_ms": self.elapsed_ms(), **fields}
+        try:
+            self.on_event(event)
+        except Exception as e:
+            self.logger.warning(f"Dropping trace event {event_type}: {e}")
@@ -1,8 +1,9 @@
 from fastapi import FastAPI
-from routes import image, chat
+from routes import image, chat, metrics
 
 
 app = FastAPI(title="🚗 Car Assistant Chatbot API")
 
 app.include_router(image.image_router)
-app.include_router(chat.chat_router)
\ No newline at end of file
+app.include_router(chat.chat_router)
+app.include_router(metrics.metrics_router)
\ No newline at end of file
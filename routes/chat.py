@@ -1,12 +1,30 @@
-from fastapi import APIRouter
+import asyncio
+import json
+
+from typing import Optional
+
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
 from models import ChatRequest, ChatResponse
 from controllers import ChatbotController
+from helpers.config import get_settings
+from helpers.sessions import SessionGate
+from helpers.tracer import AgentTracer
 
 chat_router = APIRouter()
 chatbot = ChatbotController()
 
+# One request at a time per session, and retries with the same Idempotency-Key reuse the result.
+session_gate = SessionGate(
+    max_entries=get_settings().CHAT_IDEMPOTENCY_MAX_ENTRIES,
+    ttl_seconds=get_settings().CHAT_IDEMPOTENCY_TTL_SECONDS
+)
+
 @chat_router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(
+    request: ChatRequest,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key")
+):
     """
     This endpoint handles user chat requests. The POST body should include:
       - session_id (str): A unique identifier for the session.
@@ -16,28 +34,104 @@ async def chat_endpoint(request: ChatRequest):
       - car_details (str, optional): Additional details extracted from an image.
     
     The method retrieves any existing conversation history from the ChatbotController,
-    then calls the ReAct agent to generate an appropriate response. Finally, 
+    then answers through the local intent router (obvious SQL or chit-chat) or the
+    ReAct agent. Finally, 
     it appends the latest user message and the generated response to the conversation history.
+
+    Requests for the same session are handled one at a time. A retry that sends the
+    same Idempotency-Key header as an earlier request of the session gets that
+    request's response (waiting for it if it is still running) instead of a new answer.
     """
-    # Retrieve any existing conversation history from in-memory store
-    existing_history = chatbot.get_conversation_history(
-        session_id=request.session_id,
-        user_id=request.user_id
-    )
+    async def compute() -> str:
+        # Retrieve the recent turns of the conversation from the conversation store
+        existing_history = chatbot.get_conversation_turns(
+            session_id=request.session_id,
+            user_id=request.user_id
+        )
 
-    # Pass the user query to the ReAct agent for response generation
-    response_text = chatbot.react_agent(
-        user_prompt=request.user_query,
-        conversation_history=(existing_history or request.conversation_history),
-        car_details=request.car_details
-    )
+        # Route the user query to a fast path or the ReAct agent for response generation;
+        # blocking work runs off the event loop, so other sessions are not held up.
+        response_text = await chatbot.aanswer(
+            user_prompt=request.user_query,
+            conversation_history=(existing_history or request.conversation_history),
+            car_details=request.car_details
+        )
 
-    # Store the updated conversation in the controller's in-memory store
-    chatbot.append_to_history(
-        session_id=request.session_id,
-        user_id=request.user_id,
-        user_text=request.user_query,
-        assistant_text=response_text
-    )
+        # Store the new turn in the conversation store
+        chatbot.append_to_history(
+            session_id=request.session_id,
+            user_id=request.user_id,
+            user_text=request.user_query,
+            assistant_text=response_text
+        )
+        return response_text
 
+    response_text = await session_gate.run(
+        (request.session_id, request.user_id),
+        compute,
+        idempotency_key=idempotency_key
+    )
     return ChatResponse(assistant_response=response_text)
+
+
+def format_sse(event: dict) -> str:
+    """
+    Formats one trace event as a Server-Sent Events message.
+    """
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+
+@chat_router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Same as /chat, but streams the agent's progress as Server-Sent Events while it runs:
+    route, step_start, thought, tool_call, observation, tool_timeout, deadline_exhausted
+    and final_answer. Every event carries elapsed_ms since the request started; model
+    and tool events also carry their own duration_ms. The stream ends after final_answer.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    # The agent may run in a worker thread; events are handed to the event loop thread-safely.
+    tracer = AgentTracer(on_event=lambda event: loop.call_soon_threadsafe(events.put_nowait, event))
+
+    async def run_agent() -> None:
+        try:
+            # Serialized with the session's other requests, like /chat.
+            async with session_gate.lock((request.session_id, request.user_id)):
+                existing_history = chatbot.get_conversation_turns(
+                    session_id=request.session_id,
+                    user_id=request.user_id
+                )
+                response_text = await chatbot.aanswer(
+                    user_prompt=request.user_query,
+                    conversation_history=(existing_history or request.conversation_history),
+                    car_details=request.car_details,
+                    tracer=tracer
+                )
+                chatbot.append_to_history(
+                    session_id=request.session_id,
+                    user_id=request.user_id,
+                    user_text=request.user_query,
+                    assistant_text=response_text
+                )
+        except Exception as e:
+            tracer.emit("error", detail=str(e))
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, done)
+
+    async def stream():
+        agent_task = asyncio.create_task(run_agent())
+        while True:
+            event = await events.get()
+            if event is done:
+                break
+            yield format_sse(event)
+        await agent_task
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
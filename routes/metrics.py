@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+metrics_router = APIRouter()
+
+@metrics_router.get("/metrics")
+async def metrics_endpoint():
+    """
+    This endpoint exposes the LLM call metrics (latency, time-to-first-token,
+    prompt/completion tokens and errors per provider, model and call site)
+    in the Prometheus text format.
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
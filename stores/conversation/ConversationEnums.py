@@ -0,0 +1,6 @@
+from enum import Enum
+
+class ConversationStoreEnums(Enum):
+    MEMORY = "MEMORY"
+    SQLITE = "SQLITE"
+    REDIS = "REDIS"
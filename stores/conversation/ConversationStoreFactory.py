@@ -0,0 +1,33 @@
+import os
+from .providers import InMemoryConversationStore, SQLiteConversationStore, RedisConversationStore
+from .ConversationEnums import ConversationStoreEnums
+from controllers.BaseController import BaseController
+
+class ConversationStoreFactory:
+    def __init__(self, config):
+        self.config = config
+        self.base_controller = BaseController()
+
+    def create(self, provider: str):
+        if provider == ConversationStoreEnums.MEMORY.value:
+            return InMemoryConversationStore(
+                max_sessions=self.config.CONVERSATION_MAX_SESSIONS,
+                ttl_seconds=self.config.CONVERSATION_TTL_SECONDS
+            )
+        elif provider == ConversationStoreEnums.SQLITE.value:
+            db_path = self.base_controller.get_database_path(db_name="conversations")
+
+            return SQLiteConversationStore(
+                database_path=os.path.join(db_path, self.config.CONVERSATION_SQLITE_FILE),
+                max_sessions=self.config.CONVERSATION_MAX_SESSIONS,
+                ttl_seconds=self.config.CONVERSATION_TTL_SECONDS
+            )
+        elif provider == ConversationStoreEnums.REDIS.value:
+            # Optional dependency, only needed for this backend.
+            import redis
+
+            return RedisConversationStore(
+                client=redis.Redis.from_url(self.config.CONVERSATION_REDIS_URL),
+                ttl_seconds=self.config.CONVERSATION_TTL_SECONDS
+            )
+        return None
@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+
+class ConversationStoreInterface(ABC):
+    """
+    Stores one conversation per (session_id, user_id). A conversation is any
+    JSON-serializable value; sessions that are not written to for the store's TTL
+    expire, and every backend keeps its size bounded.
+    """
+
+    @abstractmethod
+    def get(self, session_id: str, user_id: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def set(self, session_id: str, user_id: str, conversation: Any) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, session_id: str, user_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
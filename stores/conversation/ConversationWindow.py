@@ -0,0 +1,128 @@
+from typing import Any, List, Optional
+
+from helpers.text import estimate_tokens, truncate_to_tokens
+
+
+class ConversationWindow:
+    """
+    Keeps a conversation as a list of turns, {"user": ..., "assistant": ..., "tokens": ...},
+    instead of one ever-growing string, and selects the recent turns that go into a prompt:
+    at most `max_turns` turns and `max_tokens` tokens, so the per-turn prompt size no longer
+    grows with the length of the session.
+
+    A stored conversation is a dict {"turns": [...]}; at most `max_stored_turns` turns are kept.
+    It may also hold a running "summary" of older turns that were folded out of the list;
+    the summary then comes first in the window.
+    """
+
+    def __init__(self, max_turns: int = 6, max_tokens: int = 1500, max_stored_turns: int = 50):
+        """
+        :param max_turns: Maximum number of recent turns in the window.
+        :param max_tokens: Maximum estimated tokens of the turns in the window.
+        :param max_stored_turns: Maximum number of turns kept per conversation.
+        """
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.max_stored_turns = max_stored_turns
+
+    @staticmethod
+    def load(stored: Any) -> dict:
+        """
+        Returns the stored conversation, or a new empty one if nothing (or an older,
+        plain-text history) was stored.
+        """
+        if isinstance(stored, dict) and isinstance(stored.get("turns"), list):
+            return stored
+        return {"turns": []}
+
+    def append(self, conversation: dict, user_text: str, assistant_text: str) -> dict:
+        """
+        Returns a copy of the conversation with the new turn appended, keeping the newest turns.
+        """
+        turn = {
+            "user": user_text,
+            "assistant": assistant_text,
+            "tokens": estimate_tokens(user_text) + estimate_tokens(assistant_text)
+        }
+        turns = conversation.get("turns", []) + [turn]
+        return {**conversation, "turns": turns[-self.max_stored_turns:]}
+
+    def window(self, conversation: dict) -> List[dict]:
+        """
+        Returns the most recent turns that fit the turn and token limits, oldest first.
+        The newest turn is always included, truncated if it alone exceeds the token limit.
+        The summary of older turns, if any, comes first as {"summary": ..., "tokens": ...}.
+        """
+        selected = self.recent_turns(conversation)
+        summary = conversation.get("summary")
+        if summary:
+            selected.insert(0, {"summary": summary, "tokens": estimate_tokens(summary)})
+        return selected
+
+    def recent_turns(self, conversation: dict) -> List[dict]:
+        selected, tokens = [], 0
+        for turn in reversed(conversation.get("turns", [])[-self.max_turns:]):
+            if selected and tokens + turn["tokens"] > self.max_tokens:
+                break
+            if not selected and turn["tokens"] > self.max_tokens:
+                turn = self.truncate_turn(turn, self.max_tokens)
+            selected.append(turn)
+            tokens += turn["tokens"]
+        selected.reverse()
+        return selected
+
+    def turns_to_fold(self, conversation: dict, min_turns: int = 1) -> List[dict]:
+        """
+        Returns the turns that no longer fit the window, oldest first, once there are at
+        least `min_turns` of them; they are ready to be folded into the summary.
+        """
+        turns = conversation.get("turns", [])
+        outside = turns[:len(turns) - len(self.recent_turns(conversation))]
+        return outside if len(outside) >= min_turns else []
+
+    @staticmethod
+    def fold(conversation: dict, folded_turns: List[dict], summary: str) -> Optional[dict]:
+        """
+        Replaces the folded turns with the new summary.
+        :return: The updated conversation, or None if the conversation no longer starts with
+            the folded turns (e.g. it was changed while the summary was being written).
+        """
+        turns = conversation.get("turns", [])
+        if turns[:len(folded_turns)] != folded_turns:
+            return None
+        return {**conversation, "summary": summary, "turns": turns[len(folded_turns):]}
+
+    @staticmethod
+    def truncate_turn(turn: dict, max_tokens: int) -> dict:
+        user_text = truncate_to_tokens(turn["user"], max_tokens // 2)
+        assistant_text = truncate_to_tokens(turn["assistant"], max_tokens - estimate_tokens(user_text))
+        return {
+            "user": user_text,
+            "assistant": assistant_text,
+            "tokens": estimate_tokens(user_text) + estimate_tokens(assistant_text)
+        }
+
+    @staticmethod
+    def render(turns: List[dict]) -> str:
+        """
+        Renders turns as "User: ... / Assistant: ..." text.
+        """
+        return "\n".join(
+            f"Summary of the earlier conversation: {turn['summary']}" if "summary" in turn
+            else f"User: {turn['user']}\nAssistant: {turn['assistant']}"
+            for turn in turns
+        )
+
+    @staticmethod
+    def to_messages(turns: List[dict]) -> List[dict]:
+        """
+        Converts turns to alternating user/assistant chat messages.
+        """
+        messages = []
+        for turn in turns:
+            if "summary" in turn:
+                messages.append({"role": "assistant", "content": f"Summary of the earlier conversation: {turn['summary']}"})
+                continue
+            messages.append({"role": "user", "content": turn["user"]})
+            messages.append({"role": "assistant", "content": turn["assistant"]})
+        return messages
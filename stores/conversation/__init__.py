@@ -0,0 +1,4 @@
+from .ConversationStoreFactory import ConversationStoreFactory
+from .ConversationStoreInterface import ConversationStoreInterface
+from .ConversationEnums import ConversationStoreEnums
+from .ConversationWindow import ConversationWindow
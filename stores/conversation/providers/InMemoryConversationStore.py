@@ -0,0 +1,30 @@
+from typing import Any, Optional
+
+from helpers.cache import TTLCache
+from ..ConversationStoreInterface import ConversationStoreInterface
+
+
+class InMemoryConversationStore(ConversationStoreInterface):
+    """
+    Conversations in process memory, in an LRU cache that also expires idle sessions.
+    Each worker process has its own copy; use the SQLite or Redis store to share them.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: Optional[float] = 86400.0):
+        """
+        :param max_sessions: Maximum number of stored sessions; the least recently used one is evicted first.
+        :param ttl_seconds: Sessions not written to for this long expire, or None to keep them until evicted.
+        """
+        self.conversations = TTLCache(name="conversations", max_entries=max_sessions, ttl_seconds=ttl_seconds)
+
+    def get(self, session_id: str, user_id: str) -> Optional[Any]:
+        return self.conversations.get((session_id, user_id))
+
+    def set(self, session_id: str, user_id: str, conversation: Any) -> None:
+        self.conversations.set((session_id, user_id), conversation)
+
+    def delete(self, session_id: str, user_id: str) -> None:
+        self.conversations.delete((session_id, user_id))
+
+    def close(self) -> None:
+        self.conversations.clear()
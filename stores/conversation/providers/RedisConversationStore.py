@@ -0,0 +1,53 @@
+import json
+from typing import Any, Optional
+
+from ..ConversationStoreInterface import ConversationStoreInterface
+
+
+class RedisConversationStore(ConversationStoreInterface):
+    """
+    Conversations in Redis (or any server speaking its protocol), shared by all
+    workers and hosts. Each session is one key that expires `ttl_seconds` after its
+    last write; the server's maxmemory policy bounds the total size.
+
+    `client` only needs get, set (with `ex`) and delete, so a redis.Redis instance
+    and a local stand-in such as fakeredis.FakeRedis both work.
+    """
+
+    def __init__(self, client, ttl_seconds: Optional[float] = 86400.0, key_prefix: str = "conversation:"):
+        """
+        :param client: A Redis client.
+        :param ttl_seconds: Sessions not written to for this long expire, or None to keep them.
+        :param key_prefix: Prefix of the session keys.
+        """
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    def key(self, session_id: str, user_id: str) -> str:
+        # JSON-encoded, so ids containing the separator cannot collide.
+        return self.key_prefix + json.dumps([session_id, user_id], ensure_ascii=False)
+
+    def get(self, session_id: str, user_id: str) -> Optional[Any]:
+        serialized = self.client.get(self.key(session_id, user_id))
+        if serialized is None:
+            return None
+        if isinstance(serialized, bytes):
+            serialized = serialized.decode("utf-8")
+        return json.loads(serialized)
+
+    def set(self, session_id: str, user_id: str, conversation: Any) -> None:
+        ttl = max(int(self.ttl_seconds), 1) if self.ttl_seconds else None
+        self.client.set(
+            self.key(session_id, user_id),
+            json.dumps(conversation, ensure_ascii=False),
+            ex=ttl
+        )
+
+    def delete(self, session_id: str, user_id: str) -> None:
+        self.client.delete(self.key(session_id, user_id))
+
+    def close(self) -> None:
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
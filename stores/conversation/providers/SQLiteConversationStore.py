@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from ..ConversationStoreInterface import ConversationStoreInterface
+
+
+class SQLiteConversationStore(ConversationStoreInterface):
+    """
+    Conversations in a SQLite file in WAL mode, so several worker processes on the
+    same host share them: readers never block the writer, and writers wait for each
+    other for up to `busy_timeout_ms`.
+
+    Expired sessions are never returned; every `purge_interval` writes, expired
+    sessions and the least recently written ones beyond `max_sessions` are deleted.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        max_sessions: int = 10000,
+        ttl_seconds: Optional[float] = 86400.0,
+        purge_interval: int = 100,
+        busy_timeout_ms: int = 5000
+    ):
+        """
+        :param database_path: Path of the SQLite file, created if missing.
+        :param max_sessions: Maximum number of stored sessions.
+        :param ttl_seconds: Sessions not written to for this long expire, or None to keep them until evicted.
+        :param purge_interval: Number of writes between purges.
+        :param busy_timeout_ms: How long a write waits for another process's write to finish.
+        """
+        self.database_path = database_path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        directory = os.path.dirname(database_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection per process, serialized by `lock`; autocommit mode.
+        self.connection = sqlite3.connect(database_path, check_same_thread=False, isolation_level=None)
+        self.connection.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "session_id TEXT NOT NULL, "
+            "user_id TEXT NOT NULL, "
+            "conversation TEXT NOT NULL, "
+            "updated_at REAL NOT NULL, "
+            "PRIMARY KEY (session_id, user_id)"
+            ") WITHOUT ROWID"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_conversations_updated_at ON conversations (updated_at)"
+        )
+
+    def get(self, session_id: str, user_id: str) -> Optional[Any]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT conversation, updated_at FROM conversations WHERE session_id = ? AND user_id = ?",
+                (session_id, user_id)
+            ).fetchone()
+        if row is None:
+            return None
+        if self.ttl_seconds and row[1] < time.time() - self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def set(self, session_id: str, user_id: str, conversation: Any) -> None:
+        serialized = json.dumps(conversation, ensure_ascii=False)
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO conversations (session_id, user_id, conversation, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (session_id, user_id) DO UPDATE SET "
+                "conversation = excluded.conversation, updated_at = excluded.updated_at",
+                (session_id, user_id, serialized, time.time())
+            )
+            self.writes += 1
+            if self.writes % self.purge_interval == 0:
+                self.purge()
+
+    def delete(self, session_id: str, user_id: str) -> None:
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM conversations WHERE session_id = ? AND user_id = ?",
+                (session_id, user_id)
+            )
+
+    def purge(self) -> None:
+        # Must be called with `lock` held.
+        if self.ttl_seconds:
+            self.connection.execute(
+                "DELETE FROM conversations WHERE updated_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+        cursor = self.connection.execute(
+            "DELETE FROM conversations WHERE (session_id, user_id) IN ("
+            "SELECT session_id, user_id FROM conversations ORDER BY updated_at DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.max_sessions,)
+        )
+        if cursor.rowcount:
+            self.logger.info(f"Evicted {cursor.rowcount} sessions beyond the limit of {self.max_sessions}.")
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
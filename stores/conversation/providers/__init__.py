@@ -0,0 +1,3 @@
+from .InMemoryConversationStore import InMemoryConversationStore
+from .SQLiteConversationStore import SQLiteConversationStore
+from .RedisConversationStore import RedisConversationStore
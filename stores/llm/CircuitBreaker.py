@@ -0,0 +1,63 @@
+import threading
+import time
+
+from .LLMEnums import CircuitStateEnums
+
+
+class CircuitBreaker:
+    """
+    A per-backend circuit breaker.
+    After `failure_threshold` consecutive failures the circuit opens and the backend
+    is skipped until `reset_timeout_seconds` have passed. Then a single trial request
+    is let through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout_seconds: float = 30.0):
+        """
+        :param failure_threshold: Consecutive failures needed to open the circuit.
+        :param reset_timeout_seconds: Time to wait before letting a trial request through.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+
+        self.state = CircuitStateEnums.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Checks whether a request may be sent to the backend right now.
+        :return: True if the circuit is closed, or if this call is the half-open trial.
+        """
+        with self.lock:
+            if self.state == CircuitStateEnums.CLOSED:
+                return True
+
+            if self.state == CircuitStateEnums.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout_seconds:
+                    return False
+                self.state = CircuitStateEnums.HALF_OPEN
+                self.trial_in_flight = False
+
+            # Half-open: only one trial request at a time.
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.state = CircuitStateEnums.CLOSED
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.consecutive_failures += 1
+            self.trial_in_flight = False
+            if (self.state == CircuitStateEnums.HALF_OPEN
+                    or self.consecutive_failures >= self.failure_threshold):
+                self.state = CircuitStateEnums.OPEN
+                self.opened_at = time.monotonic()
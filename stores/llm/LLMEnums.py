@@ -3,6 +3,8 @@ from enum import Enum
 class LLMEnums(Enum):
     OPENAI = "OPENAI"
     GROQ = "GROQ"
+    HEDGED = "HEDGED"
+    REPLAY = "REPLAY"
 
 class OpenAIEnums(Enum):
     SYSTEM = "system"
@@ -15,3 +17,11 @@ class GroqEnums(Enum):
     ASSISTANT = "assistant"
 
 
+class CircuitStateEnums(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class ReplayModeEnums(Enum):
+    RECORD = "record"
+    REPLAY = "replay"
@@ -12,7 +12,13 @@ class LLMInterface(ABC):
 
     @abstractmethod
     def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
-                            temperature: float = None) -> str:
+                            temperature: float = None, timeout: float = None, stop: list = None) -> str:
+        pass
+
+    @abstractmethod
+    def generate_with_tools(self, chat_history: list, tools: list, max_output_tokens: int = None,
+                            temperature: float = None, tool_choice: str = "auto",
+                            timeout: float = None, stop: list = None) -> dict:
         pass
 
 
@@ -0,0 +1,179 @@
+import json
+import random
+import threading
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import Counter, Histogram
+
+LABELS = ["provider", "model", "call_site"]
+
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+LLM_CALL_LATENCY = Histogram(
+    "llm_call_latency_seconds",
+    "Wall-clock latency of LLM provider calls.",
+    LABELS
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time until the first token is received (equals latency for non-streaming calls).",
+    LABELS
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Prompt tokens per LLM call, as reported by the provider.",
+    LABELS,
+    buckets=TOKEN_BUCKETS
+)
+LLM_COMPLETION_TOKENS = Histogram(
+    "llm_completion_tokens",
+    "Completion tokens per LLM call, as reported by the provider.",
+    LABELS,
+    buckets=TOKEN_BUCKETS
+)
+LLM_CALL_ERRORS = Counter(
+    "llm_call_errors_total",
+    "LLM provider calls that failed, by error class.",
+    LABELS + ["error_class"]
+)
+
+
+def read_usage(usage, key: str):
+    """
+    Reads a token count from a usage object (SDK response) or dict (LangChain llm_output).
+    """
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage.get(key)
+    return getattr(usage, key, None)
+
+
+class LLMCallTracker:
+    """
+    Context manager that records latency, time-to-first-token, token usage and
+    error class for a single provider call.
+
+    Usage:
+        with LLMCallTracker("GROQ", model_id, "generate_text") as call:
+            response = client.chat.completions.create(...)
+            call.record_usage(response.usage)
+    """
+
+    def __init__(self, provider: str, model: str, call_site: str):
+        self.labels = {
+            "provider": provider or "unknown",
+            "model": model or "unknown",
+            "call_site": call_site
+        }
+        self.start = None
+        self.first_token_at = None
+        self.error_class = None
+
+    def __enter__(self) -> "LLMCallTracker":
+        self.start = time.perf_counter()
+        return self
+
+    def mark_first_token(self) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def record_usage(self, usage) -> None:
+        """
+        :param usage: The provider's usage object or dict with prompt_tokens / completion_tokens.
+        """
+        prompt_tokens = read_usage(usage, "prompt_tokens")
+        completion_tokens = read_usage(usage, "completion_tokens")
+        if prompt_tokens is not None:
+            LLM_PROMPT_TOKENS.labels(**self.labels).observe(prompt_tokens)
+        if completion_tokens is not None:
+            LLM_COMPLETION_TOKENS.labels(**self.labels).observe(completion_tokens)
+
+    def record_error(self, error_class: str) -> None:
+        """
+        Records a failure that was handled inside the call (e.g. an empty response).
+        """
+        self.error_class = error_class
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.error_class = exc_type.__name__
+
+        LLM_CALL_LATENCY.labels(**self.labels).observe(end - self.start)
+        LLM_TIME_TO_FIRST_TOKEN.labels(**self.labels).observe((self.first_token_at or end) - self.start)
+        if self.error_class:
+            LLM_CALL_ERRORS.labels(**self.labels, error_class=self.error_class).inc()
+
+        # Never swallow the exception.
+        return False
+
+
+class LLMMetricsCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler that records the same metrics as LLMCallTracker
+    for chat models returned by LLM_CHAT (used by the SQL chain).
+    """
+
+    def __init__(self, provider: str, model: str, call_site: str = "llm_chat"):
+        self.provider = provider
+        self.model = model
+        self.call_site = call_site
+        self.trackers = {}
+        self.lock = threading.Lock()
+
+    def start_tracking(self, run_id) -> None:
+        tracker = LLMCallTracker(self.provider, self.model, self.call_site).__enter__()
+        with self.lock:
+            self.trackers[run_id] = tracker
+
+    def stop_tracking(self, run_id, error: BaseException = None, usage=None) -> None:
+        with self.lock:
+            tracker = self.trackers.pop(run_id, None)
+        if tracker is None:
+            return
+        tracker.record_usage(usage)
+        if error is not None:
+            tracker.record_error(type(error).__name__)
+        tracker.__exit__(None, None, None)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self.start_tracking(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self.start_tracking(run_id)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs) -> None:
+        with self.lock:
+            tracker = self.trackers.get(run_id)
+        if tracker is not None:
+            tracker.mark_first_token()
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        llm_output = response.llm_output or {}
+        self.stop_tracking(run_id, usage=llm_output.get("token_usage"))
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self.stop_tracking(run_id, error=error)
+
+
+def log_llm_request(logger, sample_rate: float, provider: str, model: str,
+                    call_site: str, messages: list) -> None:
+    """
+    Logs a sampled, structured summary of an outgoing LLM request (roles and sizes, not content).
+    :param sample_rate: Fraction of requests to log, between 0.0 (off) and 1.0 (all).
+    """
+    if not sample_rate or random.random() >= sample_rate:
+        return
+
+    logger.info(json.dumps({
+        "event": "llm_request",
+        "provider": provider,
+        "model": model,
+        "call_site": call_site,
+        "message_count": len(messages),
+        "messages": [
+            {"role": message.get("role"), "chars": len(str(message.get("content") or ""))}
+            for message in messages
+        ],
+    }))
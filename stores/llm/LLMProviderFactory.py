@@ -1,10 +1,13 @@
-from .LLMEnums import LLMEnums
-from .providers import OpenAIProvider, GroqProvider
+import os
+from .LLMEnums import LLMEnums, ReplayModeEnums
+from .providers import OpenAIProvider, GroqProvider, HedgedProvider, ReplayProvider
+from .ReplayStore import ReplayStore
 
 class LLMProviderFactory:
     def __init__(self, config: dict ,azure =True):
         self.config = config
         self.azure= azure
+        self.replay_store = None
         
     def create(self, provider: str):
         if provider == LLMEnums.OPENAI.value:
@@ -15,7 +18,9 @@ class LLMProviderFactory:
                     azure_endpoint = self.config.AZURE_OPENAI_ENDPOINT,
                     default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                     default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                    default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE
+                    default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                    log_sample_rate=self.config.LLM_LOG_SAMPLE_RATE,
+                    default_request_timeout=self.config.LLM_REQUEST_TIMEOUT_SECONDS
                 )
             else:
                 return OpenAIProvider(
@@ -23,14 +28,66 @@ class LLMProviderFactory:
                     azure_endpoint =None ,
                     default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                     default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                    default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE
+                    default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                    log_sample_rate=self.config.LLM_LOG_SAMPLE_RATE,
+                    default_request_timeout=self.config.LLM_REQUEST_TIMEOUT_SECONDS
                 )
         elif provider == LLMEnums.GROQ.value :
             return GroqProvider(
                 api_key = self.config.GROQ_API_KEY,
                 default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE
+                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                log_sample_rate=self.config.LLM_LOG_SAMPLE_RATE,
+                default_request_timeout=self.config.LLM_REQUEST_TIMEOUT_SECONDS
+            )
+        elif provider == LLMEnums.HEDGED.value:
+            backends = self.parse_list(self.config.HEDGE_BACKENDS)
+            return HedgedProvider(
+                providers={
+                    name: self.create(provider=name)
+                    for name in backends
+                    if name != LLMEnums.HEDGED.value
+                },
+                hedge_latency_percentile=self.config.HEDGE_LATENCY_PERCENTILE,
+                hedge_min_delay_seconds=self.config.HEDGE_MIN_DELAY_SECONDS,
+                failure_threshold=self.config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout_seconds=self.config.CIRCUIT_BREAKER_RESET_SECONDS,
+                generation_model_ids=dict(zip(backends, self.parse_list(self.config.HEDGE_GENERATION_MODEL_IDS))),
+                vision_model_ids=dict(zip(backends, self.parse_list(self.config.HEDGE_VISION_MODEL_IDS)))
+            )
+
+        elif provider == LLMEnums.REPLAY.value:
+            inner = None
+            if self.config.REPLAY_MODE == ReplayModeEnums.RECORD.value:
+                inner = self.create(provider=self.config.REPLAY_BACKEND)
+            return ReplayProvider(
+                store=self.get_replay_store(),
+                mode=self.config.REPLAY_MODE,
+                inner=inner,
+                latency_scale=self.config.REPLAY_LATENCY_SCALE
             )
 
         return None
+
+    def get_replay_store(self) -> ReplayStore:
+        """
+        Returns the ReplayStore for REPLAY_FILE, shared by every REPLAY provider of this factory.
+        Relative paths are resolved against assets/replay.
+        """
+        if self.replay_store is None:
+            replay_path = self.config.REPLAY_FILE
+            if not os.path.isabs(replay_path):
+                base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+                replay_path = os.path.join(base_dir, "assets", "replay", replay_path)
+            self.replay_store = ReplayStore(file_path=replay_path)
+        return self.replay_store
+
+    @staticmethod
+    def parse_list(value: str) -> list:
+        """
+        Splits a comma-separated setting such as "GROQ,OPENAI" into a list.
+        """
+        if not value:
+            return []
+        return [item.strip() for item in value.split(",") if item.strip()]
@@ -0,0 +1,42 @@
+class MessageBuilder:
+    """
+    An immutable builder for chat message lists.
+
+    Every `add`/`extend` returns a new builder and leaves the original untouched, so a
+    shared prefix (system prompt, tool spec, conversation history) can be built once and
+    reused. Messages sent to the provider are always prefix + new delta, which keeps the
+    prefix byte-identical between calls and lets provider-side prompt caching hit.
+    """
+
+    __slots__ = ("_messages",)
+
+    def __init__(self, messages: tuple = ()):
+        """
+        :param messages: Initial message dictionaries; they are copied.
+        """
+        self._messages = tuple(dict(message) for message in messages)
+
+    def add(self, role: str, content: str, **fields) -> "MessageBuilder":
+        """
+        Returns a new builder with one message appended.
+        :param role: The role of the message (system, user, assistant).
+        :param content: The text of the message.
+        :param fields: Extra message fields, if any.
+        """
+        return MessageBuilder(self._messages + ({"role": role, "content": content, **fields},))
+
+    def extend(self, messages: list) -> "MessageBuilder":
+        """
+        Returns a new builder with several messages appended.
+        :param messages: Message dictionaries to append.
+        """
+        return MessageBuilder(self._messages + tuple(messages))
+
+    def build(self) -> list:
+        """
+        Returns the messages as a fresh list of fresh dictionaries, safe to hand to a provider.
+        """
+        return [dict(message) for message in self._messages]
+
+    def __len__(self) -> int:
+        return len(self._messages)
@@ -4,13 +4,9 @@ class PromptTemplate:
     conversation and vision analysis.
     """
 
-    def get_vision_prompt(self) -> str:
-        """
-        Constructs a prompt for analyzing car images.
-        This prompt is tailored to identify the car's make, model, year,
-        and other specifications (e.g., color, body type, condition).
-        """
-        persona = """
+    # Static prompt parts are assembled once at import time, so each call only
+    # formats the part that depends on its arguments.
+    VISION_PERSONA = """
         You are a highly skilled and professional assistant specializing exclusively in the buying and selling of cars.
         Your expertise includes evaluating car values, identifying makes and models, estimating car conditions,
         and guiding clients through the car buying or selling process.
@@ -21,7 +17,7 @@ class PromptTemplate:
         If uncertain about any details, respond with: "I don't know."
         """
 
-        instruction = """
+    VISION_INSTRUCTION = """
         You are provided with an image of a car. Your task is to identify key details such as make, model, year, color, body type (SUV, sedan, etc.),
         and estimated condition. Offer valuable insights that would assist in buying or selling this car.
         Ensure your answer is concise and does not exceed 50 words.
@@ -29,36 +25,126 @@ class PromptTemplate:
         "I am sorry, but I can only assist with car-related images. I specialize in the automotive domain."
         """
 
-        return persona + instruction
-
-
-    def text_propt_user(self, user_prompt: str) -> str:
-        """
-        Constructs a prompt based on the user's query. Merges the user's prompt
-        with a defined persona and instructions that focus on car-related details.
-        """
-        persona = """
+    TEXT_USER_PERSONA = """
         You are a highly skilled and professional assistant with expertise in the automotive market. Your role involves guiding clients through the car buying and selling process, evaluating vehicle values, negotiating deals, and offering market insights. 
         Your responses should be concise, practical, and friendly, ensuring clarity and value for the user. 
         Please limit your answers to topics specifically related to cars or car images, and refrain from offering information outside the automotive domain.
         """
 
-        instruction = """
+    TEXT_USER_INSTRUCTION = """
         You are a chatbot expert focused on cars, their specifications, and pricing. Provide brief, clear answers to car-related questions in no more than two sentences (up to 300 words total), and avoid discussing irrelevant topics.
         Ensure to answer in the same language as the user's query .
         """
 
-        context = """
+    TEXT_USER_CONTEXT = """
         The user is seeking assistance with buying or selling a car. They may have uploaded a car image or are asking questions specifically related to vehicles.
         """
 
-        tone = "Respond in a professional, concise, and friendly manner.\n"
+    TEXT_USER_TONE = "Respond in a professional, concise, and friendly manner.\n"
+
+    VISION_PROMPT = VISION_PERSONA + VISION_INSTRUCTION
+    TEXT_USER_PREFIX = TEXT_USER_PERSONA + TEXT_USER_INSTRUCTION + TEXT_USER_CONTEXT + TEXT_USER_TONE
+
+    REACT_SYSTEM_PROMPT = (
+        "You are an intelligent agent operating in a ReAct style:\n"
+        "1) You start with a Thought: describing your reasoning about the question.\n"
+        "2) If you need additional information or need to execute a tool, use "
+        'Action: <tool_name>: <input>, then output "PAUSE".\n'
+        "3) The tool result will come back as Observation.\n"
+        "4) Repeat as needed until you reach a final answer.\n"
+        '5) When you have your final answer for the user, output it as: Answer: <text>.\n\n'
+
+        "Available tools (Actions) are:\n"
+        "- handle_sql_mode: <SQL prompt or question>\n"
+        "  Use this category if the query involves:\n"
+        "    - Requests for data retrieval from the database or this website(e.g., oldest, newest, or cheapest car).\n"
+        "    - Specific price-related questions or comparisons.\n"
+        "    - Inquiries explicitly mentioning car models or requiring database lookup.\n"
+        "      For example: \"I want car bmw\" should be handled by handle_sql_mode because it explicitly mentions\n"
+        "      a car model and potentially requires data lookup from the database.\n"
+        "    - Detailed questions about a specific car requiring structured data processing.\n\n"
+
+        "- handle_normal_chat_mode: <text question or conversation>\n"
+        "  Use this category if the user is asking general questions not requiring SQL queries.\n"
+        "  Examples include:\n"
+        "    - General conversation about cars.\n"
+        "    - Scheduling or arranging a car.\n"
+        "    - Discussion about general features of a car.\n\n"
+
+        "- process_uploaded_image: <some file reference or data>\n"
+        "  Use this category when the user wants to analyze an uploaded car image.\n\n"
+
+        "Important:\n"
+        "- Do not reveal Thought, Action, or Observation in the final user-facing output.\n"
+        '- Only the content after "Answer:" is given to the user.\n\n'
+        "Now handle the user’s message with a ReAct approach."
+    ).strip()
+
+    REACT_TOOLS_SYSTEM_PROMPT = (
+        "You are a professional assistant specializing in buying and selling cars.\n"
+        "Reason about the user's message and call a tool whenever you need data you do not have:\n"
+        "- handle_sql_mode: look up cars, prices, specifications or comparisons in the car database.\n"
+        "- process_uploaded_image: get the details extracted from the car image the user uploaded.\n"
+        "Call tools with complete, self-contained questions. When a question needs several independent "
+        "lookups (e.g. comparing two models), make all the tool calls at once in the same step. "
+        "When you can answer, reply to the user "
+        "directly, in the same language as their message, without calling a tool and without "
+        "revealing your reasoning or the tool results verbatim."
+    )
+
+    # The model sometimes drifts into the text ReAct format and invents a tool result
+    # or the next user turn; generation is cut at these markers.
+    REACT_STOP_SEQUENCES = ("Observation:", "\nUser:")
+
+    REACT_TOOL_SCHEMAS = (
+        {
+            "type": "function",
+            "function": {
+                "name": "handle_sql_mode",
+                "description": (
+                    "Answer a question from the car database: prices, cheapest/newest/oldest cars, "
+                    "specifications, comparisons, or any request that mentions a car brand or model."
+                ),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "question": {
+                            "type": "string",
+                            "description": "A self-contained natural-language question about the cars in the database."
+                        }
+                    },
+                    "required": ["question"]
+                }
+            }
+        },
+        {
+            "type": "function",
+            "function": {
+                "name": "process_uploaded_image",
+                "description": "Get the details (make, model, year, body type, condition) extracted from the car image the user uploaded.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {}
+                }
+            }
+        },
+    )
 
-        data = f"Answer the user's inquiry in chatbot format: {user_prompt}"
+    def get_vision_prompt(self) -> str:
+        """
+        Constructs a prompt for analyzing car images.
+        This prompt is tailored to identify the car's make, model, year,
+        and other specifications (e.g., color, body type, condition).
+        """
+        return self.VISION_PROMPT
 
-        query = persona + instruction + context + tone + data
 
-        return query
+    def text_propt_user(self, user_prompt: str) -> str:
+        """
+        Constructs a prompt based on the user's query. Merges the user's prompt
+        with a defined persona and instructions that focus on car-related details.
+        """
+        return f"{self.TEXT_USER_PREFIX}Answer the user's inquiry in chatbot format: {user_prompt}"
 
     def text_propt_system(self) -> str:
         """
@@ -96,6 +182,23 @@ class PromptTemplate:
         return prompt
 
     
+    def sql_query_prompt(self) -> str:
+        """
+        Returns the prompt that turns a question into a SQLite query.
+        Placeholders: {schema} (compact schema context), {top_k} and {question}.
+        """
+        return (
+            "You are a SQLite expert. Given a question, write one syntactically correct SQLite query "
+            "that answers it.\n"
+            "Unless the question asks for a specific number of results, return at most {top_k} rows "
+            "using LIMIT. Select only the columns needed to answer the question and wrap column names "
+            "in double quotes. Use only the columns listed below; text columns marked \"one of\" only "
+            "contain the listed values. Match brand and model names case-insensitively with LIKE.\n\n"
+            "Schema:\n{schema}\n\n"
+            "Question: {question}\n"
+            "SQLQuery: "
+        )
+
     def sql_agent_prompt(self):
         return """Given the following user question, corresponding SQL query, and SQL result, answer the user question.
     
@@ -104,6 +207,28 @@ class PromptTemplate:
                 SQL Result: {result}
                 Answer: """
 
+    def conversation_summary_system_prompt(self, max_words: int) -> str:
+        """
+        Returns the system prompt of the model that folds old turns into the running summary.
+        """
+        return (
+            "You maintain a running summary of a conversation between a user and a car assistant. "
+            "Merge the new turns into the current summary. Keep every fact that may matter later: "
+            "the user's needs, budget and preferences, the cars, brands, prices and specifications "
+            "that were discussed, and any decisions or open questions. Leave out greetings and filler. "
+            f"Reply with the updated summary only, in plain text, at most {max_words} words."
+        )
+
+    def conversation_summary_user_prompt(self, summary: str, transcript: str) -> str:
+        """
+        Returns the current summary and the turns to fold into it.
+        """
+        return (
+            f"Current summary:\n{summary or '(none)'}\n\n"
+            f"New turns:\n{transcript}\n\n"
+            "Updated summary:"
+        )
+
     def get_classification_prompt(self, user_query: str) -> str:
         prompt = f"""
     You are an advanced query classification system designed for an automotive assistant chatbot.
@@ -171,42 +296,27 @@ class PromptTemplate:
 
         This prompt instructs the model to handle the user's message using the ReAct approach.
         """
-        prompt = (
-            "You are an intelligent agent operating in a ReAct style:\n"
-            "1) You start with a Thought: describing your reasoning about the question.\n"
-            "2) If you need additional information or need to execute a tool, use "
-            'Action: <tool_name>: <input>, then output "PAUSE".\n'
-            "3) The tool result will come back as Observation.\n"
-            "4) Repeat as needed until you reach a final answer.\n"
-            '5) When you have your final answer for the user, output it as: Answer: <text>.\n\n'
-
-            "Available tools (Actions) are:\n"
-            "- handle_sql_mode: <SQL prompt or question>\n"
-            "  Use this category if the query involves:\n"
-            "    - Requests for data retrieval from the database or this website(e.g., oldest, newest, or cheapest car).\n"
-            "    - Specific price-related questions or comparisons.\n"
-            "    - Inquiries explicitly mentioning car models or requiring database lookup.\n"
-            "      For example: \"I want car bmw\" should be handled by handle_sql_mode because it explicitly mentions\n"
-            "      a car model and potentially requires data lookup from the database.\n"
-            "    - Detailed questions about a specific car requiring structured data processing.\n\n"
-
-            "- handle_normal_chat_mode: <text question or conversation>\n"
-            "  Use this category if the user is asking general questions not requiring SQL queries.\n"
-            "  Examples include:\n"
-            "    - General conversation about cars.\n"
-            "    - Scheduling or arranging a car.\n"
-            "    - Discussion about general features of a car.\n\n"
-
-            "- process_uploaded_image: <some file reference or data>\n"
-            "  Use this category when the user wants to analyze an uploaded car image.\n\n"
-
-            "Important:\n"
-            "- Do not reveal Thought, Action, or Observation in the final user-facing output.\n"
-            '- Only the content after "Answer:" is given to the user.\n\n'
-            "Now handle the user’s message with a ReAct approach."
-        ).strip()
+        return self.REACT_SYSTEM_PROMPT
 
-        return prompt
+    def react_tools_system_prompt(self) -> str:
+        """
+        Returns the system prompt for the agent when tools are passed through the
+        provider's native function-calling API. It is much shorter than the text
+        ReAct prompt because the tool definitions travel as JSON schemas.
+        """
+        return self.REACT_TOOLS_SYSTEM_PROMPT
+
+    def react_tool_schemas(self) -> list:
+        """
+        Returns the agent's tools as JSON schemas in the OpenAI-compatible function-calling format.
+        """
+        return list(self.REACT_TOOL_SCHEMAS)
+
+    def react_stop_sequences(self) -> list:
+        """
+        Returns the stop sequences for agent generations.
+        """
+        return list(self.REACT_STOP_SEQUENCES)
 
     
 
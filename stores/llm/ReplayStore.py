@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+
+class ReplayStore:
+    """
+    A JSON-lines file of recorded LLM request/response pairs.
+    Each line holds the request key, the method, the response and the recorded latency.
+    When the same request was recorded several times, lookups cycle through the recordings.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        :param file_path: Path of the JSON-lines file to read from and append to.
+        """
+        self.file_path = file_path
+        self.records = {}
+        self.cursors = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        self.load()
+
+    def load(self) -> None:
+        """
+        Loads all recordings from the file, if it exists.
+        """
+        if not os.path.exists(self.file_path):
+            return
+
+        with open(self.file_path, "r", encoding="utf-8") as replay_file:
+            for line_number, line in enumerate(replay_file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    self.logger.warning(f"Skipping malformed replay line {line_number} in {self.file_path}")
+                    continue
+                self.records.setdefault(entry["key"], []).append(entry)
+
+    @staticmethod
+    def make_key(method: str, payload: dict) -> str:
+        """
+        Builds a stable key for a request from its method and parameters.
+        """
+        serialized = json.dumps({"method": method, **payload}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str):
+        """
+        :return: The next recorded entry for the key, or None if it was never recorded.
+        """
+        with self.lock:
+            entries = self.records.get(key)
+            if not entries:
+                return None
+            cursor = self.cursors.get(key, 0)
+            self.cursors[key] = cursor + 1
+            return entries[cursor % len(entries)]
+
+    def record(self, key: str, method: str, response, latency_seconds: float) -> None:
+        """
+        Appends a request/response pair to the file and to the in-memory index.
+        """
+        entry = {
+            "key": key,
+            "method": method,
+            "response": response,
+            "latency_seconds": latency_seconds
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+
+        with self.lock:
+            directory = os.path.dirname(self.file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.file_path, "a", encoding="utf-8") as replay_file:
+                replay_file.write(line + "\n")
+            self.records.setdefault(key, []).append(entry)
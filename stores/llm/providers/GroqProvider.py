@@ -3,6 +3,9 @@ import base64
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import GroqEnums
 from ..PromptTemplate import get_prompt_template
+from ..MessageBuilder import MessageBuilder
+from ..LLMEnums import LLMEnums
+from ..LLMMetrics import LLMCallTracker, LLMMetricsCallbackHandler, log_llm_request
 from groq import Groq
 from langchain_groq import ChatGroq
 
@@ -20,7 +23,9 @@ class GroqProvider(LLMInterface):
         api_key: str,
         default_input_max_characters: int = 10000,
         default_generation_max_output_tokens: int = 1000,
-        default_generation_temperature: float = 0.0
+        default_generation_temperature: float = 0.0,
+        log_sample_rate: float = 0.0,
+        default_request_timeout: float = None
     ):
         """
         Initializes the GroqProvider with default settings and a Groq client.
@@ -29,11 +34,16 @@ class GroqProvider(LLMInterface):
         :param default_input_max_characters: Maximum input size allowed for text prompts.
         :param default_generation_max_output_tokens: Maximum tokens for model output generation.
         :param default_generation_temperature: Temperature for text generation (0.0 = deterministic).
+        :param log_sample_rate: Fraction of requests logged as structured request summaries.
+        :param default_request_timeout: Timeout in seconds for each API request (None = SDK default).
         """
         self.api_key = api_key
         self.default_input_max_characters = default_input_max_characters
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.log_sample_rate = log_sample_rate
+        self.default_request_timeout = default_request_timeout
+        self.provider_name = LLMEnums.GROQ.value
 
         self.generation_model_id = None
         self.vision_model_id = None
@@ -74,13 +84,32 @@ class GroqProvider(LLMInterface):
         return base64.b64encode(uploaded_image.file.read()).decode("utf-8")
         # return base64.b64encode(uploaded_image.read()).decode("utf-8")
 
+    def timeout_option(self, timeout: float = None) -> dict:
+        """
+        Returns the per-request timeout keyword for the SDK, or nothing so the SDK default applies.
+        :param timeout: The timeout for this request; falls back to default_request_timeout.
+        """
+        if timeout is None:
+            timeout = self.default_request_timeout
+        return {"timeout": timeout} if timeout is not None else {}
+
+    def stop_option(self, stop: list = None) -> dict:
+        """
+        Returns the stop-sequence keyword for the SDK, or nothing when no stop sequences are given.
+        The API accepts at most four sequences.
+        :param stop: Sequences at which the model stops generating.
+        """
+        return {"stop": list(stop)[:4]} if stop else {}
+
     def generate_text(
         self,
         prompt: str,
         chat_history: list = None,
         max_output_tokens: int = None,
         temperature: float = None ,
-        type_chat :str ="RAG"
+        type_chat :str ="RAG",
+        timeout: float = None,
+        stop: list = None
     ) -> str:
         """
         Generates text from the model based on the given prompt and optional parameters.
@@ -88,6 +117,9 @@ class GroqProvider(LLMInterface):
         :param chat_history: A list of previous message objects to provide conversation context.
         :param max_output_tokens: The maximum number of tokens in the generated response.
         :param temperature: The model's sampling temperature (0 = deterministic, higher = more creative).
+        :param type_chat: The chat mode: "RAG", "chat", or "agent" (chat_history is the full prefix).
+        :param timeout: Timeout in seconds for this request; defaults to default_request_timeout.
+        :param stop: Sequences at which the model stops generating (at most four).
         :return: The generated response from the Groq model, or None on failure.
         """
         if chat_history is None:
@@ -101,59 +133,159 @@ class GroqProvider(LLMInterface):
             self.logger.error("No generation model has been set for Groq.")
             return None
 
+        if timeout is not None and timeout <= 0:
+            self.logger.error("No time left for the Groq request; skipping it.")
+            return None
+
         # Determine tokens and temperature
         max_output_tokens = max_output_tokens or self.default_generation_max_output_tokens
         temperature = temperature if temperature is not None else self.default_generation_temperature
 
-        # Add the new prompt to the chat history
-        chat_history.append(self.construct_prompt(prompt=prompt, role=GroqEnums.USER.value))
-        if type_chat == "RAG":
-                    messages = [
-                        {
-                            "role": GroqEnums.SYSTEM.value,
-                            "content": get_template.rag_system_prompt()
-                        },
-                        {
-                            "role": GroqEnums.USER.value,
-                            "content": get_template.rag_user_prompt(prompt)
-                        },
-                        *chat_history
-                    ]
-        elif type_chat == "chat" :
-            messages = [
-                {
-                    "role": GroqEnums.SYSTEM.value,
-                    "content": get_template.text_propt_system()
-                },
-                {
-                    "role": GroqEnums.USER.value,
-                    "content": get_template.text_propt_user(prompt)
-                },
-                *chat_history
-            ]
-            
+        # Stable prefix (system prompt + history) first, then only the new user turn.
+        # The caller's chat_history is never modified.
+        if type_chat == "agent":
+            messages = MessageBuilder().extend(chat_history)
+            user_content = self.process_text(prompt) if prompt else None
+        elif type_chat == "RAG":
+            messages = (
+                MessageBuilder()
+                .add(GroqEnums.SYSTEM.value, get_template.rag_system_prompt())
+                .extend(chat_history)
+            )
+            user_content = get_template.rag_user_prompt(prompt)
+        elif type_chat == "chat":
+            messages = (
+                MessageBuilder()
+                .add(GroqEnums.SYSTEM.value, get_template.text_propt_system())
+                .extend(chat_history)
+            )
+            user_content = get_template.text_propt_user(prompt)
+        else:
+            self.logger.error(f"Invalid type_chat: {type_chat}")
+            return None
+
+        if user_content:
+            messages = messages.add(GroqEnums.USER.value, user_content)
+        messages = messages.build()
 
+        log_llm_request(self.logger, self.log_sample_rate, self.provider_name,
+                        self.generation_model_id, "generate_text", messages)
 
         # Call Groq API for text completion
-        response = self.client.chat.completions.create(
-            model=self.generation_model_id,
-            messages=messages,
-            max_completion_tokens=max_output_tokens,
-            temperature=temperature
-        )
+        with LLMCallTracker(self.provider_name, self.generation_model_id, "generate_text") as call:
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.generation_model_id,
+                    messages=messages,
+                    max_completion_tokens=max_output_tokens,
+                    temperature=temperature,
+                    **self.stop_option(stop),
+                    **self.timeout_option(timeout)
+                )
+            except Exception as e:
+                call.record_error(type(e).__name__)
+                self.logger.error(f"Error calling Groq API: {str(e)}")
+                return None
+            call.record_usage(getattr(response, "usage", None))
 
-        # Validate response
-        if not response or not response.choices or len(response.choices) == 0:
-            self.logger.error("No response or empty choices returned from Groq.")
-            return None
+            # Validate response
+            if not response or not response.choices or len(response.choices) == 0:
+                call.record_error("EmptyResponse")
+                self.logger.error("No response or empty choices returned from Groq.")
+                return None
 
-        message_content = response.choices[0].message
-        if not message_content:
-            self.logger.error("Empty message content in the Groq response.")
-            return None
+            message_content = response.choices[0].message
+            if not message_content:
+                call.record_error("EmptyResponse")
+                self.logger.error("Empty message content in the Groq response.")
+                return None
 
         return message_content.content
     
+    def generate_with_tools(
+        self,
+        chat_history: list,
+        tools: list,
+        max_output_tokens: int = None,
+        temperature: float = None,
+        tool_choice: str = "auto",
+        timeout: float = None,
+        stop: list = None
+    ) -> dict:
+        """
+        Sends the messages with native tool (function) definitions and returns either
+        a final reply or the tool calls the model wants to make.
+        :param chat_history: The full list of messages to send.
+        :param tools: Tool definitions in the OpenAI-compatible function-calling format.
+        :param max_output_tokens: The maximum number of tokens in the generated response.
+        :param temperature: The model's sampling temperature.
+        :param tool_choice: "auto" to let the model decide, "none" to force a text reply.
+        :param timeout: Timeout in seconds for this request; defaults to default_request_timeout.
+        :param stop: Sequences at which the model stops generating (at most four).
+        :return: {"content": str, "tool_calls": [{"id", "name", "arguments"}], "finish_reason": str},
+                 or None on failure. finish_reason is "length" when the output budget was exhausted.
+        """
+        if not self.client:
+            self.logger.error("Groq client is not initialized.")
+            return None
+
+        if not self.generation_model_id:
+            self.logger.error("No generation model has been set for Groq.")
+            return None
+
+        if timeout is not None and timeout <= 0:
+            self.logger.error("No time left for the Groq request; skipping it.")
+            return None
+
+        max_output_tokens = max_output_tokens or self.default_generation_max_output_tokens
+        temperature = temperature if temperature is not None else self.default_generation_temperature
+
+        log_llm_request(self.logger, self.log_sample_rate, self.provider_name,
+                        self.generation_model_id, "generate_with_tools", chat_history)
+
+        with LLMCallTracker(self.provider_name, self.generation_model_id, "generate_with_tools") as call:
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.generation_model_id,
+                    messages=chat_history,
+                    tools=tools,
+                    tool_choice=tool_choice,
+                    max_completion_tokens=max_output_tokens,
+                    temperature=temperature,
+                    **self.stop_option(stop),
+                    **self.timeout_option(timeout)
+                )
+            except Exception as e:
+                call.record_error(type(e).__name__)
+                self.logger.error(f"Error calling Groq API: {str(e)}")
+                return None
+            call.record_usage(getattr(response, "usage", None))
+
+            if not response or not response.choices or len(response.choices) == 0:
+                call.record_error("EmptyResponse")
+                self.logger.error("No response or empty choices returned from Groq.")
+                return None
+
+            message = response.choices[0].message
+            finish_reason = response.choices[0].finish_reason
+            if not message:
+                call.record_error("EmptyResponse")
+                self.logger.error("Empty message content in the Groq response.")
+                return None
+
+        return {
+            "content": message.content,
+            "tool_calls": [
+                {
+                    "id": tool_call.id,
+                    "name": tool_call.function.name,
+                    "arguments": tool_call.function.arguments
+                }
+                for tool_call in (message.tool_calls or [])
+            ],
+            "finish_reason": finish_reason
+        }
+
     def LLM_CHAT(self , max_output_tokens =None , temperature =None):
         max_output_tokens = max_output_tokens or self.default_generation_max_output_tokens
         temperature = temperature if temperature is not None else self.default_generation_temperature
@@ -162,7 +294,8 @@ class GroqProvider(LLMInterface):
             model_name=self.generation_model_id  , 
             max_tokens= max_output_tokens ,
             temperature= temperature ,
-        
+            timeout=self.default_request_timeout,
+            callbacks=[LLMMetricsCallbackHandler(self.provider_name, self.generation_model_id)],
         )
 
     def vision_to_text(self, uploaded_image):
@@ -195,20 +328,25 @@ class GroqProvider(LLMInterface):
             }
         ]
 
-        response = self.client.chat.completions.create(
-            model=self.vision_model_id,
-            messages=payload
-        )
+        with LLMCallTracker(self.provider_name, self.vision_model_id, "vision_to_text") as call:
+            response = self.client.chat.completions.create(
+                model=self.vision_model_id,
+                messages=payload,
+                **self.timeout_option()
+            )
+            call.record_usage(getattr(response, "usage", None))
 
-        # Validate response
-        if not response or not response.choices or len(response.choices) == 0:
-            self.logger.error("No response or empty choices returned from the Groq vision model.")
-            return None
+            # Validate response
+            if not response or not response.choices or len(response.choices) == 0:
+                call.record_error("EmptyResponse")
+                self.logger.error("No response or empty choices returned from the Groq vision model.")
+                return None
 
-        message_content = response.choices[0].message
-        if not message_content:
-            self.logger.error("Empty message content in the Groq vision response.")
-            return None
+            message_content = response.choices[0].message
+            if not message_content:
+                call.record_error("EmptyResponse")
+                self.logger.error("Empty message content in the Groq vision response.")
+                return None
 
         return message_content.content
 
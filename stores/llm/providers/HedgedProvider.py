@@ -0,0 +1,304 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from ..LLMInterface import LLMInterface
+from ..CircuitBreaker import CircuitBreaker
+
+
+class HedgedProvider(LLMInterface):
+    """
+    A composite provider that wraps several LLM backends (e.g. Groq and OpenAI).
+    Text generation is sent to the primary backend first; if it has not answered within
+    the configured latency percentile of its recent calls, a hedge request is sent to the
+    next backend and the first usable response wins. Each backend has its own circuit
+    breaker, so a failing backend is skipped instead of being waited on.
+    """
+
+    def __init__(
+        self,
+        providers: dict,
+        hedge_latency_percentile: float = 95.0,
+        hedge_min_delay_seconds: float = 1.0,
+        latency_window_size: int = 100,
+        failure_threshold: int = 3,
+        reset_timeout_seconds: float = 30.0,
+        generation_model_ids: dict = None,
+        vision_model_ids: dict = None
+    ):
+        """
+        :param providers: Ordered mapping of backend name to provider; the first one is the primary.
+        :param hedge_latency_percentile: Latency percentile of the primary after which a hedge is sent.
+        :param hedge_min_delay_seconds: Lower bound for the hedge delay, also used until enough samples exist.
+        :param latency_window_size: Number of recent latencies kept per backend.
+        :param failure_threshold: Consecutive failures before a backend's circuit opens.
+        :param reset_timeout_seconds: Time before an open circuit lets a trial request through.
+        :param generation_model_ids: Optional per-backend generation model IDs.
+        :param vision_model_ids: Optional per-backend vision model IDs.
+        """
+        self.providers = dict(providers)
+        self.hedge_latency_percentile = hedge_latency_percentile
+        self.hedge_min_delay_seconds = hedge_min_delay_seconds
+        self.generation_model_ids = generation_model_ids or {}
+        self.vision_model_ids = vision_model_ids or {}
+
+        self.generation_model_id = None
+        self.vision_model_id = None
+        self.embedding_model_id = None
+
+        self.breakers = {
+            name: CircuitBreaker(
+                failure_threshold=failure_threshold,
+                reset_timeout_seconds=reset_timeout_seconds
+            )
+            for name in self.providers
+        }
+        self.latencies = {
+            name: deque(maxlen=latency_window_size)
+            for name in self.providers
+        }
+        self.latencies_lock = threading.Lock()
+
+        # Losing hedge requests keep running in the background, so leave room for them.
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(4, 4 * len(self.providers)),
+            thread_name_prefix="llm-hedge"
+        )
+        self.logger = logging.getLogger(__name__)
+
+    def set_generation_model(self, model_id: str) -> None:
+        """
+        Sets the generation model on every backend, using the per-backend override if one is configured.
+        :param model_id: The default generation model ID.
+        """
+        self.generation_model_id = model_id
+        for name, provider in self.providers.items():
+            provider.set_generation_model(self.generation_model_ids.get(name, model_id))
+
+    def set_vision_model(self, model_id: str) -> None:
+        """
+        Sets the vision model on every backend, using the per-backend override if one is configured.
+        :param model_id: The default vision model ID.
+        """
+        self.vision_model_id = model_id
+        for name, provider in self.providers.items():
+            provider.set_vision_model(self.vision_model_ids.get(name, model_id))
+
+    def set_embedding_model(self, model_id: str) -> None:
+        """
+        Sets the embedding model on the backends that support embeddings.
+        :param model_id: The embedding model ID.
+        """
+        self.embedding_model_id = model_id
+        for provider in self.providers.values():
+            if hasattr(provider, "set_embedding_model"):
+                provider.set_embedding_model(model_id)
+
+    def hedge_delay(self, name: str) -> float:
+        """
+        Returns how long to wait on a backend before hedging, based on its recent latencies.
+        :param name: The backend name.
+        :return: The hedge delay in seconds.
+        """
+        with self.latencies_lock:
+            samples = sorted(self.latencies[name])
+
+        if len(samples) < 10:
+            return self.hedge_min_delay_seconds
+
+        index = max(0, math.ceil(self.hedge_latency_percentile / 100 * len(samples)) - 1)
+        return max(self.hedge_min_delay_seconds, samples[index])
+
+    def next_backend(self, candidates: list):
+        """
+        Pops candidates until one whose circuit allows a request is found.
+        The breaker is only asked when a backend is about to be used, so a half-open
+        trial is never reserved for a backend that is not called.
+        :param candidates: Remaining (name, provider) pairs in priority order; consumed in place.
+        :return: The next usable (name, provider) pair, or None.
+        """
+        while candidates:
+            name, provider = candidates.pop(0)
+            if self.breakers[name].allow_request():
+                return name, provider
+        return None
+
+    def call_backend(self, name: str, provider, method: str, **kwargs):
+        """
+        Calls a single backend, updating its circuit breaker and latency window.
+        Never raises: failures (exceptions or None results) are logged and returned as None.
+        """
+        # Each backend gets its own copy of chat_history, so concurrent calls never share a list.
+        if isinstance(kwargs.get("chat_history"), list):
+            kwargs["chat_history"] = list(kwargs["chat_history"])
+
+        start = time.monotonic()
+        try:
+            result = getattr(provider, method)(**kwargs)
+        except Exception as e:
+            self.breakers[name].record_failure()
+            self.logger.error(f"Backend {name} failed on {method}: {str(e)}")
+            return None
+
+        if result is None:
+            self.breakers[name].record_failure()
+            return None
+
+        self.breakers[name].record_success()
+        with self.latencies_lock:
+            self.latencies[name].append(time.monotonic() - start)
+        return result
+
+    def hedged_call(self, method: str, **kwargs):
+        """
+        Sends the call to the first available backend and hedges to the next one when the
+        first is slower than its latency percentile, or fails over immediately on error.
+        A `timeout` keyword argument also bounds the total wait across backends.
+        :return: The first usable result, or None if every backend failed or the timeout passed.
+        """
+        timeout = kwargs.get("timeout")
+        if timeout is not None and timeout <= 0:
+            self.logger.error(f"No time left for {method}; skipping it.")
+            return None
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+
+        candidates = list(self.providers.items())
+        first = self.next_backend(candidates)
+        if first is None:
+            self.logger.error(f"No backend available for {method}: all circuits are open.")
+            return None
+
+        primary_name = first[0]
+        pending = set()
+
+        def launch(backend) -> None:
+            name, provider = backend
+            pending.add(self.executor.submit(self.call_backend, name, provider, method, **kwargs))
+
+        launch(first)
+        while pending:
+            wait_timeout = self.hedge_delay(primary_name) if candidates else None
+            if expires_at is not None:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    self.logger.error(f"Timed out waiting for {method} on all backends.")
+                    return None
+                wait_timeout = remaining if wait_timeout is None else min(wait_timeout, remaining)
+            done, pending = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # The primary is slower than usual: send a hedge request.
+                backend = self.next_backend(candidates)
+                if backend is not None:
+                    launch(backend)
+                continue
+
+            for future in done:
+                result = future.result()
+                if result is not None:
+                    return result
+
+            # A backend failed: fail over to the next one right away.
+            backend = self.next_backend(candidates)
+            if backend is not None:
+                launch(backend)
+
+        return None
+
+    def failover_call(self, method: str, **kwargs):
+        """
+        Tries the available backends one after another, without hedging.
+        Used for calls that share a non-reusable input, such as an uploaded file.
+        :return: The first usable result, or None if every backend failed.
+        """
+        candidates = [
+            (name, provider)
+            for name, provider in self.providers.items()
+            if hasattr(provider, method)
+        ]
+        while candidates:
+            backend = self.next_backend(candidates)
+            if backend is None:
+                break
+            name, provider = backend
+            result = self.call_backend(name, provider, method, **kwargs)
+            if result is not None:
+                return result
+        return None
+
+    def generate_text(
+        self,
+        prompt: str,
+        chat_history: list = None,
+        max_output_tokens: int = None,
+        temperature: float = None,
+        **kwargs
+    ) -> str:
+        """
+        Generates text using hedged requests across the configured backends.
+        Extra keyword arguments (e.g. type_chat) are passed through to the backends.
+        :return: The first usable response, or None if every backend failed.
+        """
+        return self.hedged_call(
+            "generate_text",
+            prompt=prompt,
+            chat_history=chat_history,
+            max_output_tokens=max_output_tokens,
+            temperature=temperature,
+            **kwargs
+        )
+
+    def generate_with_tools(
+        self,
+        chat_history: list,
+        tools: list,
+        max_output_tokens: int = None,
+        temperature: float = None,
+        tool_choice: str = "auto",
+        timeout: float = None,
+        stop: list = None
+    ) -> dict:
+        """
+        Runs a tool-calling generation using hedged requests across the configured backends.
+        :return: The first usable reply, or None if every backend failed.
+        """
+        return self.hedged_call(
+            "generate_with_tools",
+            chat_history=chat_history,
+            tools=tools,
+            max_output_tokens=max_output_tokens,
+            temperature=temperature,
+            tool_choice=tool_choice,
+            timeout=timeout,
+            stop=stop
+        )
+
+    def LLM_CHAT(self, max_output_tokens=None, temperature=None):
+        """
+        Returns the primary backend's LangChain chat model with the other backends as fallbacks.
+        LangChain handles the failover here; hedging only applies to generate_text.
+        """
+        chat_models = [
+            provider.LLM_CHAT(max_output_tokens=max_output_tokens, temperature=temperature)
+            for provider in self.providers.values()
+        ]
+        return chat_models[0].with_fallbacks(chat_models[1:])
+
+    def vision_to_text(self, uploaded_image):
+        """
+        Sends the image to the available backends in order until one answers.
+        The uploaded file is read by each attempt, so vision calls are not hedged.
+        """
+        return self.failover_call("vision_to_text", uploaded_image=uploaded_image)
+
+    def embed_text(self, text: str):
+        """
+        Embeds the text with the first available backend that supports embeddings.
+        """
+        return self.failover_call("embed_text", text=text)
+
+    def construct_prompt(self, prompt: str, role: str) -> dict:
+        primary = next(iter(self.providers.values()))
+        return primary.construct_prompt(prompt=prompt, role=role)
@@ -3,6 +3,9 @@ import base64
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import OpenAIEnums
 from ..PromptTemplate import get_prompt_template
+from ..MessageBuilder import MessageBuilder
+from ..LLMEnums import LLMEnums
+from ..LLMMetrics import LLMCallTracker, LLMMetricsCallbackHandler, log_llm_request
 from openai import OpenAI
 import os
 from openai import AzureOpenAI
@@ -25,7 +28,9 @@ class OpenAIProvider(LLMInterface):
         azure_endpoint : str = None ,
         default_input_max_characters: int = 1000,
         default_generation_max_output_tokens: int = 1000,
-        default_generation_temperature: float = 0.0
+        default_generation_temperature: float = 0.0,
+        log_sample_rate: float = 0.0,
+        default_request_timeout: float = None
     ):
         """
         Initializes the OpenAIProvider with default settings and an OpenAI client.
@@ -35,6 +40,8 @@ class OpenAIProvider(LLMInterface):
         :param default_input_max_characters: Maximum number of characters allowed in a text prompt.
         :param default_generation_max_output_tokens: Maximum number of tokens to generate in model responses.
         :param default_generation_temperature: Controls randomness in text generation (0.0 = deterministic).
+        :param log_sample_rate: Fraction of requests logged as structured request summaries.
+        :param default_request_timeout: Timeout in seconds for each API request (None = SDK default).
         """
         self.api_key = api_key
         self.azure_api = azure_api
@@ -44,6 +51,9 @@ class OpenAIProvider(LLMInterface):
         self.default_input_max_characters = default_input_max_characters
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.log_sample_rate = log_sample_rate
+        self.default_request_timeout = default_request_timeout
+        self.provider_name = LLMEnums.OPENAI.value
 
         self.generation_model_id = None
         self.vision_model_id = None
@@ -111,13 +121,32 @@ class OpenAIProvider(LLMInterface):
         return base64.b64encode(uploaded_image.file.read()).decode("utf-8")
         # return base64.b64encode(uploaded_image.read()).decode("utf-8")
 
+    def timeout_option(self, timeout: float = None) -> dict:
+        """
+        Returns the per-request timeout keyword for the SDK, or nothing so the SDK default applies.
+        :param timeout: The timeout for this request; falls back to default_request_timeout.
+        """
+        if timeout is None:
+            timeout = self.default_request_timeout
+        return {"timeout": timeout} if timeout is not None else {}
+
+    def stop_option(self, stop: list = None) -> dict:
+        """
+        Returns the stop-sequence keyword for the SDK, or nothing when no stop sequences are given.
+        The API accepts at most four sequences.
+        :param stop: Sequences at which the model stops generating.
+        """
+        return {"stop": list(stop)[:4]} if stop else {}
+
     def generate_text(
         self,
         prompt: str,
         chat_history: list = None,
         max_output_tokens: int = None,
         temperature: float = None,
-        type_chat: str = "agent"
+        type_chat: str = "agent",
+        timeout: float = None,
+        stop: list = None
     ) -> str:
         """
         Generates text from the OpenAI model based on the given prompt and chat history.
@@ -127,6 +156,8 @@ class OpenAIProvider(LLMInterface):
         :param max_output_tokens: Maximum tokens to generate. Defaults to the class default if not provided.
         :param temperature: The temperature for text generation (0.0 = deterministic). Defaults to class default.
         :param type_chat: The type of chat mode (e.g., "agent" or "chat").
+        :param timeout: Timeout in seconds for this request; defaults to default_request_timeout.
+        :param stop: Sequences at which the model stops generating (at most four).
         :return: The generated text response, or None if an error occurs.
         """
 
@@ -144,61 +175,149 @@ class OpenAIProvider(LLMInterface):
             self.logger.error("No generation model has been set for OpenAI.")
             return None
 
+        if timeout is not None and timeout <= 0:
+            self.logger.error("No time left for the OpenAI request; skipping it.")
+            return None
+
         max_output_tokens = max_output_tokens or self.default_generation_max_output_tokens
         temperature = temperature if temperature is not None else self.default_generation_temperature
 
-        # Build messages based on chat type
+        # Stable prefix (system prompt + history) first, then only the new user turn.
         if type_chat == "agent":
-            messages = [
-                {
-                    "role": OpenAIEnums.USER.value,
-                    "content": prompt,
-                },
-                *chat_history
-            ]
+            messages = MessageBuilder().extend(chat_history)
+            user_content = prompt
         elif type_chat == "chat":
-            messages = [
-                {
-                    "role": OpenAIEnums.SYSTEM.value,
-                    "content": get_template.text_propt_system()
-                },
-                {
-                    "role": OpenAIEnums.USER.value,
-                    "content": get_template.text_propt_user(prompt)
-                },
-                *chat_history
-            ]
+            messages = (
+                MessageBuilder()
+                .add(OpenAIEnums.SYSTEM.value, get_template.text_propt_system())
+                .extend(chat_history)
+            )
+            user_content = get_template.text_propt_user(prompt)
         else:
             self.logger.error(f"Invalid type_chat: {type_chat}")
             return None  # Ensure we handle unexpected values
 
-        # Debugging: Print messages before sending them to OpenAI
-        import json
-        print("DEBUG: Sending to OpenAI API:", json.dumps(messages, indent=2))
+        if user_content:
+            messages = messages.add(OpenAIEnums.USER.value, user_content)
+        messages = messages.build()
+
+        log_llm_request(self.logger, self.log_sample_rate, self.provider_name,
+                        self.generation_model_id, "generate_text", messages)
+
+        with LLMCallTracker(self.provider_name, self.generation_model_id, "generate_text") as call:
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.generation_model_id,
+                    messages=messages,
+                    max_tokens=max_output_tokens,
+                    temperature=temperature,
+                    **self.stop_option(stop),
+                    **self.timeout_option(timeout)
+                )
+            except Exception as e:
+                call.record_error(type(e).__name__)
+                self.logger.error(f"Error calling OpenAI API: {str(e)}")
+                return None
+            call.record_usage(getattr(response, "usage", None))
+
+            # Handle response errors
+            if not response or not response.choices or len(response.choices) == 0:
+                call.record_error("EmptyResponse")
+                self.logger.error("Error: Empty response or no choices returned from OpenAI.")
+                return None
+
+            if not response.choices[0].message:
+                call.record_error("EmptyResponse")
+                self.logger.error("Error: No message content in the first choice.")
+                return None
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.generation_model_id,
-                messages=messages,
-                max_tokens=max_output_tokens,
-                temperature=temperature
-            )
-        except Exception as e:
-            self.logger.error(f"Error calling OpenAI API: {str(e)}")
+        return response.choices[0].message.content
+
+    
+    def generate_with_tools(
+        self,
+        chat_history: list,
+        tools: list,
+        max_output_tokens: int = None,
+        temperature: float = None,
+        tool_choice: str = "auto",
+        timeout: float = None,
+        stop: list = None
+    ) -> dict:
+        """
+        Sends the messages with native tool (function) definitions and returns either
+        a final reply or the tool calls the model wants to make.
+        :param chat_history: The full list of messages to send.
+        :param tools: Tool definitions in the OpenAI function-calling format.
+        :param max_output_tokens: The maximum number of tokens in the generated response.
+        :param temperature: The model's sampling temperature.
+        :param tool_choice: "auto" to let the model decide, "none" to force a text reply.
+        :param timeout: Timeout in seconds for this request; defaults to default_request_timeout.
+        :param stop: Sequences at which the model stops generating (at most four).
+        :return: {"content": str, "tool_calls": [{"id", "name", "arguments"}], "finish_reason": str},
+                 or None on failure. finish_reason is "length" when the output budget was exhausted.
+        """
+        if not self.client:
+            self.logger.error("OpenAI client is not initialized.")
             return None
 
-        # Handle response errors
-        if not response or not response.choices or len(response.choices) == 0:
-            self.logger.error("Error: Empty response or no choices returned from OpenAI.")
+        if not self.generation_model_id:
+            self.logger.error("No generation model has been set for OpenAI.")
             return None
 
-        if not response.choices[0].message:
-            self.logger.error("Error: No message content in the first choice.")
+        if timeout is not None and timeout <= 0:
+            self.logger.error("No time left for the OpenAI request; skipping it.")
             return None
 
-        return response.choices[0].message.content
+        max_output_tokens = max_output_tokens or self.default_generation_max_output_tokens
+        temperature = temperature if temperature is not None else self.default_generation_temperature
+
+        log_llm_request(self.logger, self.log_sample_rate, self.provider_name,
+                        self.generation_model_id, "generate_with_tools", chat_history)
+
+        with LLMCallTracker(self.provider_name, self.generation_model_id, "generate_with_tools") as call:
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.generation_model_id,
+                    messages=chat_history,
+                    tools=tools,
+                    tool_choice=tool_choice,
+                    max_tokens=max_output_tokens,
+                    temperature=temperature,
+                    **self.stop_option(stop),
+                    **self.timeout_option(timeout)
+                )
+            except Exception as e:
+                call.record_error(type(e).__name__)
+                self.logger.error(f"Error calling OpenAI API: {str(e)}")
+                return None
+            call.record_usage(getattr(response, "usage", None))
+
+            if not response or not response.choices or len(response.choices) == 0:
+                call.record_error("EmptyResponse")
+                self.logger.error("No response or empty choices returned from OpenAI.")
+                return None
+
+            message = response.choices[0].message
+            finish_reason = response.choices[0].finish_reason
+            if not message:
+                call.record_error("EmptyResponse")
+                self.logger.error("Empty message content in the OpenAI response.")
+                return None
+
+        return {
+            "content": message.content,
+            "tool_calls": [
+                {
+                    "id": tool_call.id,
+                    "name": tool_call.function.name,
+                    "arguments": tool_call.function.arguments
+                }
+                for tool_call in (message.tool_calls or [])
+            ],
+            "finish_reason": finish_reason
+        }
 
-    
     def LLM_CHAT(self ,max_output_tokens =None , temperature=None):
         
         max_output_tokens = max_output_tokens or self.default_generation_max_output_tokens
@@ -214,7 +333,8 @@ class OpenAIProvider(LLMInterface):
                 model_name=self.generation_model_id,
                 max_tokens=max_output_tokens,
                 temperature=temperature,
-                
+                timeout=self.default_request_timeout,
+                callbacks=[LLMMetricsCallbackHandler(self.provider_name, self.generation_model_id)],
                 )
             return llm_azure
         else :
@@ -223,6 +343,8 @@ class OpenAIProvider(LLMInterface):
                 model=self.generation_model_id ,
                 max_tokens=max_output_tokens,
                 temperature=temperature,
+                timeout=self.default_request_timeout,
+                callbacks=[LLMMetricsCallbackHandler(self.provider_name, self.generation_model_id)],
                 )
             return llm_openai
         
@@ -256,18 +378,23 @@ class OpenAIProvider(LLMInterface):
             }
         ]
 
-        response = self.client.chat.completions.create(
-            model=self.vision_model_id,
-            messages=payload
-        )
+        with LLMCallTracker(self.provider_name, self.vision_model_id, "vision_to_text") as call:
+            response = self.client.chat.completions.create(
+                model=self.vision_model_id,
+                messages=payload,
+                **self.timeout_option()
+            )
+            call.record_usage(getattr(response, "usage", None))
 
-        if not response or not response.choices or len(response.choices) == 0:
-            self.logger.error("Error: Empty response or no choices returned from OpenAI vision model.")
-            return None
+            if not response or not response.choices or len(response.choices) == 0:
+                call.record_error("EmptyResponse")
+                self.logger.error("Error: Empty response or no choices returned from OpenAI vision model.")
+                return None
 
-        if not response.choices[0].message:
-            self.logger.error("Error: No message content in the vision model's first choice.")
-            return None
+            if not response.choices[0].message:
+                call.record_error("EmptyResponse")
+                self.logger.error("Error: No message content in the vision model's first choice.")
+                return None
 
         return response.choices[0].message.content
 
@@ -281,14 +408,18 @@ class OpenAIProvider(LLMInterface):
             self.logger.error("Embedding model for OpenAI was not set")
             return None
         
-        response = self.client.embeddings.create(
-            model = self.embedding_model_id,
-            input = text,
-        )
+        with LLMCallTracker(self.provider_name, self.embedding_model_id, "embed_text") as call:
+            response = self.client.embeddings.create(
+                model = self.embedding_model_id,
+                input = text,
+                **self.timeout_option()
+            )
+            call.record_usage(getattr(response, "usage", None))
 
-        if not response or not response.data or len(response.data) == 0 or not response.data[0].embedding:
-            self.logger.error("Error while embedding text with OpenAI")
-            return None
+            if not response or not response.data or len(response.data) == 0 or not response.data[0].embedding:
+                call.record_error("EmptyResponse")
+                self.logger.error("Error while embedding text with OpenAI")
+                return None
 
         return response.data[0].embedding
 
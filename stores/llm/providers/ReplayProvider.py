@@ -0,0 +1,259 @@
+import hashlib
+import logging
+import time
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from ..LLMInterface import LLMInterface
+from ..LLMEnums import LLMEnums, ReplayModeEnums
+from ..LLMMetrics import LLMCallTracker
+from ..ReplayStore import ReplayStore
+
+
+def replay_call(store: ReplayStore, mode: str, method: str, payload: dict, call,
+                latency_scale: float = 0.0, logger=None):
+    """
+    Records or replays a single call.
+
+    In record mode `call` is executed and its result is stored with its latency.
+    In replay mode the stored result is returned without calling anything, after
+    sleeping for the recorded latency multiplied by `latency_scale`.
+    :return: The (recorded or replayed) result, or None if nothing was recorded for this request.
+    """
+    key = store.make_key(method, payload)
+
+    if mode == ReplayModeEnums.RECORD.value:
+        start = time.perf_counter()
+        result = call()
+        if result is not None:
+            store.record(key, method, result, time.perf_counter() - start)
+        return result
+
+    entry = store.lookup(key)
+    if entry is None:
+        if logger:
+            logger.warning(f"No recording found for {method} (key {key[:12]}).")
+        return None
+
+    if latency_scale:
+        time.sleep(entry["latency_seconds"] * latency_scale)
+    return entry["response"]
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    LangChain chat model counterpart of ReplayProvider, used by the SQL chain.
+    Records the wrapped chat model's answers, or replays them offline.
+    """
+
+    store: Any
+    mode: str
+    inner: Any = None
+    model_id: Optional[str] = None
+    latency_scale: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any
+    ) -> ChatResult:
+        payload = {
+            "model": self.model_id,
+            "messages": [{"type": message.type, "content": message.content} for message in messages],
+            "stop": stop
+        }
+
+        def call():
+            return self.inner.invoke(messages, stop=stop).content
+
+        text = replay_call(self.store, self.mode, "llm_chat", payload, call, self.latency_scale)
+        if text is None:
+            raise ValueError("No recording found for this LLM_CHAT request.")
+
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+class ReplayProvider(LLMInterface):
+    """
+    A provider that records real request/response pairs (including timing) to a local
+    file, or serves them back offline. Replaying makes load and regression tests of the
+    whole app deterministic and independent of the upstream APIs.
+    """
+
+    def __init__(
+        self,
+        store: ReplayStore,
+        mode: str = ReplayModeEnums.REPLAY.value,
+        inner: LLMInterface = None,
+        latency_scale: float = 0.0
+    ):
+        """
+        :param store: The ReplayStore holding the recordings.
+        :param mode: "record" to call `inner` and store results, "replay" to serve stored results.
+        :param inner: The real provider; required in record mode.
+        :param latency_scale: Multiplier applied to recorded latencies when replaying (0 = no delay).
+        """
+        if mode == ReplayModeEnums.RECORD.value and inner is None:
+            raise ValueError("ReplayProvider needs an inner provider in record mode.")
+
+        self.store = store
+        self.mode = mode
+        self.inner = inner
+        self.latency_scale = latency_scale
+
+        self.generation_model_id = None
+        self.vision_model_id = None
+        self.embedding_model_id = None
+
+        self.provider_name = LLMEnums.REPLAY.value
+        self.logger = logging.getLogger(__name__)
+
+    def set_generation_model(self, model_id: str) -> None:
+        self.generation_model_id = model_id
+        if self.inner:
+            self.inner.set_generation_model(model_id)
+
+    def set_vision_model(self, model_id: str) -> None:
+        self.vision_model_id = model_id
+        if self.inner:
+            self.inner.set_vision_model(model_id)
+
+    def set_embedding_model(self, model_id: str) -> None:
+        self.embedding_model_id = model_id
+        if self.inner and hasattr(self.inner, "set_embedding_model"):
+            self.inner.set_embedding_model(model_id)
+
+    def replay(self, method: str, model_id: str, payload: dict, call):
+        """
+        Records or replays a provider call; replayed calls are tracked under the REPLAY provider label.
+        """
+        payload = {"model": model_id, **payload}
+        if self.mode == ReplayModeEnums.RECORD.value:
+            return replay_call(self.store, self.mode, method, payload, call, logger=self.logger)
+
+        with LLMCallTracker(self.provider_name, model_id, method) as tracker:
+            result = replay_call(self.store, self.mode, method, payload, call,
+                                 self.latency_scale, logger=self.logger)
+            if result is None:
+                tracker.record_error("ReplayMiss")
+        return result
+
+    def generate_text(
+        self,
+        prompt: str,
+        chat_history: list = None,
+        max_output_tokens: int = None,
+        temperature: float = None,
+        timeout: float = None,
+        **kwargs
+    ) -> str:
+        """
+        Records or replays a text generation call; extra keyword arguments are part of the request key,
+        the timeout is not.
+        """
+        payload = {
+            "prompt": prompt,
+            "chat_history": chat_history or [],
+            "max_output_tokens": max_output_tokens,
+            "temperature": temperature,
+            **kwargs
+        }
+        return self.replay(
+            "generate_text",
+            self.generation_model_id,
+            payload,
+            lambda: self.inner.generate_text(
+                prompt=prompt,
+                chat_history=chat_history,
+                max_output_tokens=max_output_tokens,
+                temperature=temperature,
+                timeout=timeout,
+                **kwargs
+            )
+        )
+
+    def generate_with_tools(
+        self,
+        chat_history: list,
+        tools: list,
+        max_output_tokens: int = None,
+        temperature: float = None,
+        tool_choice: str = "auto",
+        timeout: float = None,
+        stop: list = None
+    ) -> dict:
+        """
+        Records or replays a tool-calling generation; the tool definitions are part of the request key,
+        the timeout is not.
+        """
+        payload = {
+            "chat_history": chat_history,
+            "tools": tools,
+            "max_output_tokens": max_output_tokens,
+            "temperature": temperature,
+            "tool_choice": tool_choice,
+            "stop": stop
+        }
+        return self.replay(
+            "generate_with_tools",
+            self.generation_model_id,
+            payload,
+            lambda: self.inner.generate_with_tools(
+                chat_history=chat_history,
+                tools=tools,
+                max_output_tokens=max_output_tokens,
+                temperature=temperature,
+                tool_choice=tool_choice,
+                timeout=timeout,
+                stop=stop
+            )
+        )
+
+    def LLM_CHAT(self, max_output_tokens=None, temperature=None):
+        inner_chat = None
+        if self.mode == ReplayModeEnums.RECORD.value:
+            inner_chat = self.inner.LLM_CHAT(max_output_tokens=max_output_tokens, temperature=temperature)
+
+        return ReplayChatModel(
+            store=self.store,
+            mode=self.mode,
+            inner=inner_chat,
+            model_id=self.generation_model_id,
+            latency_scale=self.latency_scale
+        )
+
+    def vision_to_text(self, uploaded_image):
+        """
+        Records or replays a vision call; the request is keyed by a hash of the image bytes.
+        """
+        uploaded_image.file.seek(0)
+        image_hash = hashlib.sha256(uploaded_image.file.read()).hexdigest()
+        uploaded_image.file.seek(0)
+
+        return self.replay(
+            "vision_to_text",
+            self.vision_model_id,
+            {"image_sha256": image_hash},
+            lambda: self.inner.vision_to_text(uploaded_image)
+        )
+
+    def embed_text(self, text: str):
+        return self.replay(
+            "embed_text",
+            self.embedding_model_id,
+            {"text": text},
+            lambda: self.inner.embed_text(text)
+        )
+
+    def construct_prompt(self, prompt: str, role: str) -> dict:
+        return {
+            "role": role,
+            "content": prompt
+        }
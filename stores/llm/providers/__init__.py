@@ -1,2 +1,4 @@
 from .GroqProvider import GroqProvider
-from .OpenAIProvider import OpenAIProvider
\ No newline at end of file
+from .OpenAIProvider import OpenAIProvider
+from .HedgedProvider import HedgedProvider
+from .ReplayProvider import ReplayProvider
@@ -0,0 +1,132 @@
+import logging
+import re
+import sqlite3
+from collections import defaultdict
+
+from prometheus_client import Counter
+
+from .SQLiteExecutor import SQLiteExecutor
+
+SQL_GUARD_REJECTIONS = Counter(
+    "sql_guard_rejections_total",
+    "Generated SQL queries rejected before execution, by reason.",
+    ["reason"]
+)
+
+
+class QueryRejected(ValueError):
+    """
+    Raised when a generated query must not run. `hint` explains why, in words the model can act on.
+    """
+
+    def __init__(self, reason: str, hint: str):
+        super().__init__(hint)
+        self.reason = reason
+        self.hint = hint
+
+
+class QueryGuard:
+    """
+    Checks LLM-generated SQL before it runs:
+    - a single SELECT (or WITH ... SELECT) statement, nothing that writes or changes settings;
+    - an EXPLAIN QUERY PLAN without full scans whose (nested) row estimate is too large,
+      such as a scan of a huge table or a join without a usable condition;
+    - a LIMIT, which is added when the query has none (one row above the executor's
+      row limit, so truncation is still reported).
+    """
+
+    # String literals and quoted identifiers, blanked out before looking for keywords.
+    QUOTED_PATTERN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]")
+    # Comments, or quoted text matched first so "--" inside a literal ('%--%') is not a comment.
+    COMMENT_PATTERN = re.compile(rf"(?P<quoted>{QUOTED_PATTERN.pattern})|--[^\n]*|/\*.*?\*/", re.DOTALL)
+    # Statement keywords only: a keyword followed by "(" is a function call, e.g. REPLACE(Model_Number, '-', ' ').
+    FORBIDDEN_PATTERN = re.compile(
+        r"\b(insert|update|delete|replace|upsert|drop|alter|create|attach|detach|pragma|vacuum|reindex|analyze)\b(?!\s*\()",
+        re.IGNORECASE
+    )
+    LIMIT_PATTERN = re.compile(r"\blimit\s+\d+(\s*(,|offset)\s*\d+)?\s*$", re.IGNORECASE)
+    # "FROM cars AS a" / "JOIN cars b", to map plan aliases back to tables.
+    ALIAS_PATTERN = re.compile(
+        r"\b(?:from|join)\s+[\"`\[]?(\w+)[\"`\]]?(?:\s+(?:as\s+)?(?!where|join|on|group|order|limit|inner|left|cross|natural)(\w+))?",
+        re.IGNORECASE
+    )
+    SCAN_PATTERN = re.compile(r"^SCAN (\S+)")
+
+    def __init__(self, executor: SQLiteExecutor, max_rows: int = 50, max_scan_rows: int = 200000):
+        """
+        :param executor: The executor the query will run on (used for EXPLAIN and table sizes).
+        :param max_rows: The executor's row limit; queries without a LIMIT get max_rows + 1.
+        :param max_scan_rows: Largest estimated number of rows a plan may scan.
+        """
+        self.executor = executor
+        self.max_rows = max_rows
+        self.max_scan_rows = max_scan_rows
+        self.logger = logging.getLogger(__name__)
+
+    def reject(self, reason: str, hint: str):
+        SQL_GUARD_REJECTIONS.labels(reason=reason).inc()
+        raise QueryRejected(reason, hint)
+
+    def check(self, sql: str) -> str:
+        """
+        :param sql: The generated query.
+        :return: The query to execute, with a LIMIT if it had none.
+        :raises QueryRejected: If the query must not run.
+        """
+        sql = self.COMMENT_PATTERN.sub(
+            lambda match: match.group("quoted") or " ", sql or ""
+        ).strip().rstrip(";").strip()
+        if not sql:
+            self.reject("empty", "The query is empty.")
+
+        unquoted = self.QUOTED_PATTERN.sub("''", sql)
+        if ";" in unquoted:
+            self.reject("multiple_statements", "Write exactly one SQL statement.")
+        if not re.match(r"^\s*(select|with)\b", unquoted, re.IGNORECASE):
+            self.reject("not_select", "Only SELECT queries are allowed.")
+        if self.FORBIDDEN_PATTERN.search(unquoted):
+            self.reject("not_select", "Only read-only SELECT queries are allowed.")
+
+        try:
+            plan = self.executor.explain(sql)
+        except sqlite3.Error as e:
+            self.reject("invalid", f"The query is not valid SQLite: {e}.")
+
+        estimated_rows = self.estimate_scanned_rows(plan, unquoted)
+        if estimated_rows > self.max_scan_rows:
+            self.reject(
+                "expensive_plan",
+                f"The query would scan about {estimated_rows} rows. Join tables only on matching "
+                f"columns and filter with WHERE instead of combining every row with every other row."
+            )
+
+        # One row more than the executor returns, so it can still tell that the result was truncated.
+        if not self.LIMIT_PATTERN.search(unquoted):
+            sql = f"{sql}\nLIMIT {self.max_rows + 1}"
+        return sql
+
+    def estimate_scanned_rows(self, plan: list, unquoted_sql: str) -> int:
+        """
+        Estimates the rows visited by the full scans of a plan: scans under the same
+        parent are nested loops (their sizes multiply), separate subqueries are not.
+        """
+        table_sizes = self.executor.table_sizes()
+        largest_table = max(table_sizes.values(), default=0)
+
+        aliases = {}
+        for table, alias in self.ALIAS_PATTERN.findall(unquoted_sql):
+            aliases[table.lower()] = table.lower()
+            if alias:
+                aliases[alias.lower()] = table.lower()
+
+        loops = defaultdict(lambda: 1)
+        for _, parent, _, detail in plan:
+            match = self.SCAN_PATTERN.match(detail)
+            if not match or detail.startswith("SCAN CONSTANT ROW"):
+                continue
+            name = match.group(1).lower()
+            # Unknown names (materialized subqueries, views) count as the largest table.
+            size = table_sizes.get(aliases.get(name, name), largest_table)
+            loops[parent] *= max(size, 1)
+
+        return max(loops.values(), default=0)
@@ -0,0 +1,196 @@
+import re
+from typing import List, Optional
+
+
+class ResultFormatter:
+    """
+    Turns simple SQL results into a short answer without an LLM call:
+    - no rows: a "nothing found" sentence;
+    - a single value (COUNT, AVG, MIN, ...): "Average price: $31,670";
+    - a single row: one "column: value" line per column;
+    - a few rows of a few columns: a compact table.
+
+    Anything larger returns None and is left to the answer-phrasing LLM.
+    """
+
+    AGGREGATE_LABELS = {
+        "avg": "Average",
+        "count": "Number of",
+        "min": "Lowest",
+        "max": "Highest",
+        "sum": "Total",
+        "total": "Total",
+    }
+    AGGREGATE_PATTERN = re.compile(r"^(avg|count|min|max|sum|total)\s*\(\s*(distinct\s+)?(.*?)\s*\)$", re.IGNORECASE)
+    ROUND_PATTERN = re.compile(r"^round\s*\(\s*(.*?)\s*(,\s*\d+\s*)?\)$", re.IGNORECASE)
+    ALIAS_PATTERN = re.compile(r"^(.*?)\s+as\s+(\S+)$", re.IGNORECASE | re.DOTALL)
+    # "MAX(Price) top_price"; CASE ... END is not an alias.
+    BARE_ALIAS_PATTERN = re.compile(r"^(.*[\w)\]\"`])\s+(?!end$)([a-z_]\w*|\"[^\"]+\")$", re.IGNORECASE | re.DOTALL)
+    # Columns holding money amounts, shown as "$31,670".
+    CURRENCY_PATTERN = re.compile(r"price|cost|msrp", re.IGNORECASE)
+    # Aggregates that keep the unit of their argument (unlike COUNT).
+    CURRENCY_AGGREGATES = {"avg", "min", "max", "sum", "total"}
+
+    def __init__(
+        self,
+        item_label: str = "cars",
+        max_row_columns: int = 8,
+        max_table_rows: int = 10,
+        max_table_columns: int = 4
+    ):
+        """
+        :param item_label: What a row is, used in "Number of cars" and "No matching cars".
+        :param max_row_columns: Widest single-row result formatted as "column: value" lines.
+        :param max_table_rows: Most rows formatted as a table.
+        :param max_table_columns: Widest multi-row result formatted as a table.
+        """
+        self.item_label = item_label
+        self.max_row_columns = max_row_columns
+        self.max_table_rows = max_table_rows
+        self.max_table_columns = max_table_columns
+
+    def format(self, result: dict, query: Optional[str] = None) -> Optional[str]:
+        """
+        :param result: A SQLiteExecutor.query() result.
+        :param query: The SQL that produced it; its select list decides which columns are
+            money amounts, so an alias like "COUNT(*) AS price_count" is not shown as one.
+        :return: The formatted answer, or None if the result is an error or too large to format.
+        """
+        if result.get("error") or result.get("truncated"):
+            return None
+
+        columns: List[str] = result.get("columns") or []
+        rows: List[tuple] = result.get("rows") or []
+        if not columns:
+            return None
+
+        expressions = self.select_expressions(query) if query else []
+        if len(expressions) != len(columns):
+            # e.g. "SELECT *": fall back to the column names.
+            expressions = columns
+        currency = [self.is_currency(expression) for expression in expressions]
+
+        if not rows or all(value is None for row in rows for value in row):
+            return f"No matching {self.item_label} were found in the catalog."
+
+        labels = [self.label(column) for column in columns]
+
+        if len(rows) == 1 and len(columns) == 1:
+            return f"{labels[0]}: {self.format_value(rows[0][0], currency[0])}"
+
+        if len(rows) == 1 and len(columns) <= self.max_row_columns:
+            return "\n".join(
+                f"- {label}: {self.format_value(value, is_currency)}"
+                for label, is_currency, value in zip(labels, currency, rows[0])
+            )
+
+        if len(rows) <= self.max_table_rows and len(columns) <= self.max_table_columns:
+            lines = [" | ".join(labels)]
+            for row in rows:
+                lines.append("- " + " | ".join(
+                    self.format_value(value, is_currency) for is_currency, value in zip(currency, row)
+                ))
+            return "\n".join(lines)
+
+        return None
+
+    def label(self, column: str) -> str:
+        """
+        Humanizes a result column name: "AVG(Price)" -> "Average price", "MPG_City" -> "MPG city".
+        """
+        column = column.strip().strip("\"`[]")
+        match = self.AGGREGATE_PATTERN.match(column)
+        if not match:
+            return self.humanize(column)
+
+        function, distinct, argument = match.groups()
+        argument = argument.strip("\"`[]")
+        if function.lower() == "count":
+            if argument == "*" or not argument:
+                return f"Number of {self.item_label}"
+            prefix = "Number of distinct" if distinct else "Number of"
+            return f"{prefix} {self.humanize(argument, capitalize=False)} values"
+        return f"{self.AGGREGATE_LABELS[function.lower()]} {self.humanize(argument, capitalize=False)}"
+
+    @staticmethod
+    def humanize(column: str, capitalize: bool = True) -> str:
+        words = column.replace("_", " ").split()
+        if not words:
+            return column
+        # Keep acronyms (MPG) as they are, capitalize the first word only.
+        words = [word if word.isupper() else word.lower() for word in words]
+        if capitalize:
+            words[0] = words[0][0].upper() + words[0][1:]
+        return " ".join(words)
+
+    def is_currency(self, expression: str) -> bool:
+        """
+        Whether a select-list expression is a money amount: a price column, or AVG/MIN/MAX/SUM
+        of one, optionally rounded. COUNTs and other expressions are not.
+        """
+        expression = expression.strip()
+        match = self.ROUND_PATTERN.match(expression)
+        if match:
+            expression = match.group(1)
+        match = self.AGGREGATE_PATTERN.match(expression)
+        if match:
+            function, _, expression = match.groups()
+            if function.lower() not in self.CURRENCY_AGGREGATES:
+                return False
+        # A plain (possibly quoted or table-qualified) column name.
+        column = expression.split(".")[-1].strip("\"`[]")
+        return column.replace("_", "").isalnum() and bool(self.CURRENCY_PATTERN.search(column))
+
+    @classmethod
+    def select_expressions(cls, query: str) -> List[str]:
+        """
+        Returns the expressions of the outermost select list, without their aliases,
+        or [] if the query cannot be split.
+        """
+        items, current, depth = [], [], 0
+        in_select = False
+        for token in re.split(r"""('[^']*'|"[^"]*"|[(),]|\s+)""", query):
+            if not token:
+                continue
+            if token[0] in "'\"":
+                current.append(token)
+                continue
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+            elif depth == 0 and not in_select:
+                if token.lower() == "select":
+                    in_select = True
+                continue
+            elif depth == 0 and token.lower() == "from":
+                break
+            elif depth == 0 and token == ",":
+                items.append("".join(current))
+                current = []
+                continue
+            if in_select:
+                current.append(token)
+        if not in_select:
+            return []
+        items.append("".join(current))
+
+        expressions = []
+        for item in items:
+            item = re.sub(r"^\s*(distinct|all)\s+", "", item, flags=re.IGNORECASE).strip()
+            match = cls.ALIAS_PATTERN.match(item) or cls.BARE_ALIAS_PATTERN.match(item)
+            expressions.append(match.group(1).strip() if match else item)
+        return expressions
+
+    def format_value(self, value, is_currency: bool = False) -> str:
+        if value is None:
+            return "n/a"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if is_currency:
+                return f"${value:,.0f}"
+            if isinstance(value, float) and value.is_integer():
+                return f"{int(value):,}"
+            if isinstance(value, float):
+                return f"{value:,.2f}"
+            return f"{value:,}"
+        return str(value)
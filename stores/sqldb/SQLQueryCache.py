@@ -0,0 +1,136 @@
+import logging
+import threading
+from collections import deque
+from typing import Callable, List, Optional
+
+import numpy as np
+from prometheus_client import Counter
+
+from helpers.cache import TTLCache
+from helpers.text import normalize_query
+
+NL_TO_SQL_CACHE_LOOKUPS = Counter(
+    "nl_to_sql_cache_lookups_total",
+    "NL-to-SQL cache lookups, by result (exact_hit, similar_hit or miss).",
+    ["result"]
+)
+NL_TO_SQL_CACHE_INVALIDATIONS = Counter(
+    "nl_to_sql_cache_invalidations_total",
+    "Times the NL-to-SQL cache was cleared because the database schema or data changed."
+)
+
+
+class SQLQueryCache:
+    """
+    Caches generated SQL by the normalized question, so repeat questions skip the
+    query-writing LLM call. Optionally, when an embedding function is given, a question
+    whose embedding is close enough to a cached one reuses that question's SQL.
+
+    Only SQL that executed successfully should be stored. The whole cache is cleared
+    when the database version changes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        embed: Optional[Callable[[str], List[float]]] = None,
+        similarity_threshold: float = 0.95,
+        max_similar_entries: int = 512
+    ):
+        """
+        :param max_entries: Maximum number of cached questions.
+        :param ttl_seconds: Lifetime of a cached query, or None to keep it until evicted.
+        :param embed: Returns the embedding of a text; enables the similarity lookup.
+        :param similarity_threshold: Minimum cosine similarity for a similar-question hit.
+        :param max_similar_entries: Number of recent question embeddings kept for the similarity lookup.
+        """
+        self.queries = TTLCache(name="nl_to_sql", max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        # (normalized question, unit vector) pairs, most recent last.
+        self.embeddings = deque(maxlen=max_similar_entries)
+        # Embeddings of questions that just missed, reused when their SQL is stored,
+        # so a miss costs one embedding call.
+        self.pending_vectors = TTLCache(name="nl_to_sql_pending_embeddings", max_entries=256, ttl_seconds=300)
+
+        self.version = None
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def check_version(self, version: str) -> None:
+        """
+        Clears the cache if the database version changed since the last call.
+        """
+        with self.lock:
+            if self.version == version:
+                return
+            if self.version is not None:
+                self.queries.clear()
+                self.embeddings.clear()
+                self.pending_vectors.clear()
+                NL_TO_SQL_CACHE_INVALIDATIONS.inc()
+                self.logger.info("NL-to-SQL cache cleared after a database change.")
+            self.version = version
+
+    def embed_question(self, normalized_question: str) -> Optional[np.ndarray]:
+        if self.embed is None:
+            return None
+        try:
+            vector = self.embed(normalized_question)
+        except Exception as e:
+            self.logger.warning(f"Could not embed question for the NL-to-SQL cache: {e}")
+            return None
+        if not vector:
+            return None
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(self, question: str, version: str) -> Optional[str]:
+        """
+        :param question: The user's question.
+        :param version: The current database version.
+        :return: Cached SQL for this (or a very similar) question, or None.
+        """
+        self.check_version(version)
+        normalized_question = normalize_query(question)
+
+        sql = self.queries.get(normalized_question)
+        if sql is not None:
+            NL_TO_SQL_CACHE_LOOKUPS.labels(result="exact_hit").inc()
+            return sql
+
+        vector = self.embed_question(normalized_question) if self.embeddings else None
+        if vector is not None:
+            with self.lock:
+                candidates = list(self.embeddings)
+            similarities = np.stack([candidate for _, candidate in candidates]) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.similarity_threshold:
+                sql = self.queries.get(candidates[best][0])
+                if sql is not None:
+                    NL_TO_SQL_CACHE_LOOKUPS.labels(result="similar_hit").inc()
+                    return sql
+
+        if vector is not None:
+            self.pending_vectors.set(normalized_question, vector)
+        NL_TO_SQL_CACHE_LOOKUPS.labels(result="miss").inc()
+        return None
+
+    def store(self, question: str, version: str, sql: str) -> None:
+        """
+        Caches SQL that was generated for the question and executed successfully.
+        """
+        self.check_version(version)
+        normalized_question = normalize_query(question)
+        self.queries.set(normalized_question, sql)
+
+        vector = self.pending_vectors.get(normalized_question)
+        if vector is None:
+            vector = self.embed_question(normalized_question)
+        else:
+            self.pending_vectors.delete(normalized_question)
+        if vector is not None:
+            with self.lock:
+                self.embeddings.append((normalized_question, vector))
@@ -0,0 +1,284 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+SQL_QUERY_LATENCY = Histogram(
+    "sql_query_latency_seconds",
+    "Execution time of generated SQL queries, including fetching the results."
+)
+SQL_QUERY_OUTCOMES = Counter(
+    "sql_query_outcomes_total",
+    "Generated SQL queries by outcome (ok, truncated, timeout, error).",
+    ["outcome"]
+)
+
+
+class SQLiteExecutor:
+    """
+    Runs generated SQL against the car database on a small pool of read-only
+    SQLite connections (mode=ro, query_only, memory-mapped I/O and a large page cache).
+
+    Every query is bounded: a progress handler interrupts it after `timeout_seconds`,
+    and at most `max_rows` rows / `max_bytes` bytes of result are returned, so a bad
+    query can neither block a worker nor flood the prompt.
+
+    With `in_memory`, the database file is loaded once into an in-memory snapshot with
+    the backup API, and every pooled connection serves queries from its own in-memory
+    copy of that snapshot, so queries never touch the disk or file locks. When the file
+    changes, a new snapshot is loaded and swapped in; connections move to it on next use.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        pool_size: int = 4,
+        timeout_seconds: float = 5.0,
+        max_rows: int = 50,
+        max_bytes: int = 8000,
+        mmap_size_bytes: int = 256 * 1024 * 1024,
+        cache_size_kb: int = 64 * 1024,
+        in_memory: bool = False
+    ):
+        """
+        :param database_path: Path of the SQLite database file.
+        :param pool_size: Maximum number of open connections (and concurrent queries).
+        :param timeout_seconds: Queries running longer than this are interrupted.
+        :param max_rows: Maximum number of rows returned per query.
+        :param max_bytes: Maximum size of the rendered result per query.
+        :param mmap_size_bytes: PRAGMA mmap_size for each connection.
+        :param cache_size_kb: Page cache size for each connection, in KiB.
+        :param in_memory: Serve queries from in-memory copies of the database instead of the file.
+        """
+        self.database_path = database_path
+        self.pool_size = pool_size
+        self.timeout_seconds = timeout_seconds
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.mmap_size_bytes = mmap_size_bytes
+        self.cache_size_kb = cache_size_kb
+        self.in_memory = in_memory
+        self.table_sizes_cache = None
+
+        # The current in-memory snapshot as a (connection, version) pair, replaced as a whole.
+        self.snapshot: Optional[Tuple[sqlite3.Connection, str]] = None
+        self.snapshot_lock = threading.Lock()
+
+        # Idle connections, each tagged with the database version it was opened on.
+        self.pool: "queue.LifoQueue[Tuple[sqlite3.Connection, str]]" = queue.LifoQueue()
+        for _ in range(pool_size):
+            self.pool.put((None, None))
+
+        self.logger = logging.getLogger(__name__)
+
+        if in_memory:
+            try:
+                self.get_snapshot(self.version())
+            except sqlite3.Error as e:
+                self.logger.error(f"Could not load {database_path} into memory: {e}")
+
+    def version(self) -> str:
+        try:
+            stat = os.stat(self.database_path)
+        except OSError:
+            return "missing"
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def get_snapshot(self, version: str) -> sqlite3.Connection:
+        """
+        Returns the in-memory snapshot of the given database version, loading it from the file if needed.
+        """
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot[1] == version:
+            return snapshot[0]
+
+        with self.snapshot_lock:
+            if self.snapshot is None or self.snapshot[1] != version:
+                source = sqlite3.connect(f"file:{self.database_path}?mode=ro", uri=True)
+                try:
+                    target = sqlite3.connect(":memory:", check_same_thread=False)
+                    source.backup(target)
+                finally:
+                    source.close()
+                # Swap the whole pair at once; the old snapshot is closed when no longer referenced.
+                self.snapshot = (target, version)
+                self.logger.info(f"Loaded {self.database_path} (version {version}) into memory.")
+            return self.snapshot[0]
+
+    def connect(self, version: str) -> sqlite3.Connection:
+        if self.in_memory:
+            snapshot = self.get_snapshot(version)
+            connection = sqlite3.connect(":memory:", check_same_thread=False)
+            with self.snapshot_lock:
+                snapshot.backup(connection)
+        else:
+            connection = sqlite3.connect(
+                f"file:{self.database_path}?mode=ro",
+                uri=True,
+                check_same_thread=False
+            )
+        connection.execute("PRAGMA query_only = ON")
+        connection.execute(f"PRAGMA mmap_size = {int(self.mmap_size_bytes)}")
+        connection.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        connection.execute("PRAGMA temp_store = MEMORY")
+        return connection
+
+    def acquire(self) -> Tuple[sqlite3.Connection, str]:
+        """
+        Takes a connection from the pool, waiting if all are busy. Connections opened on an
+        older version of the database file are reopened, so a replaced file is picked up.
+        """
+        connection, connection_version = self.pool.get()
+        version = self.version()
+        if connection is not None and connection_version != version:
+            connection.close()
+            connection = None
+        if connection is None:
+            try:
+                connection = self.connect(version)
+            except Exception:
+                self.pool.put((None, None))
+                raise
+        return connection, version
+
+    def release(self, connection: sqlite3.Connection, version: str) -> None:
+        self.pool.put((connection, version))
+
+    def execute(self, sql: str, timeout_seconds: Optional[float] = None) -> Tuple[List[str], List[tuple], bool]:
+        """
+        Executes one query within the time, row and byte limits.
+
+        :param sql: The SQL query.
+        :param timeout_seconds: Overrides the default timeout for this query.
+        :return: The column names, the rows, and whether the result was truncated.
+        :raises sqlite3.Error: If the query fails or is interrupted by the timeout.
+        """
+        timeout_seconds = timeout_seconds or self.timeout_seconds
+        connection, version = self.acquire()
+        started_at = time.perf_counter()
+        expires_at = time.monotonic() + timeout_seconds
+
+        # Called every 1000 SQLite VM instructions; a non-zero return aborts the query.
+        connection.set_progress_handler(lambda: int(time.monotonic() > expires_at), 1000)
+        try:
+            cursor = connection.execute(sql)
+            columns = [description[0] for description in (cursor.description or [])]
+
+            rows, size, truncated = [], 0, False
+            for row in cursor:
+                size += len(repr(row))
+                if len(rows) >= self.max_rows or size > self.max_bytes:
+                    truncated = True
+                    break
+                rows.append(tuple(row))
+            cursor.close()
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                SQL_QUERY_OUTCOMES.labels(outcome="timeout").inc()
+                self.logger.warning(f"SQL query interrupted after {timeout_seconds}s: {sql}")
+            else:
+                SQL_QUERY_OUTCOMES.labels(outcome="error").inc()
+            raise
+        except sqlite3.Error:
+            SQL_QUERY_OUTCOMES.labels(outcome="error").inc()
+            raise
+        finally:
+            connection.set_progress_handler(None, 1000)
+            SQL_QUERY_LATENCY.observe(time.perf_counter() - started_at)
+            self.release(connection, version)
+
+        SQL_QUERY_OUTCOMES.labels(outcome="truncated" if truncated else "ok").inc()
+        return columns, rows, truncated
+
+    def explain(self, sql: str) -> List[tuple]:
+        """
+        :return: The EXPLAIN QUERY PLAN rows (id, parent, notused, detail) of the query.
+        :raises sqlite3.Error: If the query does not compile.
+        """
+        connection, version = self.acquire()
+        try:
+            return connection.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        finally:
+            self.release(connection, version)
+
+    def table_sizes(self) -> dict:
+        """
+        :return: The row count of every table, cached per database version.
+        """
+        version = self.version()
+        cached = self.table_sizes_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        connection, connection_version = self.acquire()
+        try:
+            tables = [
+                row[0] for row in connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+                )
+            ]
+            sizes = {}
+            for table in tables:
+                try:
+                    quoted_table = '"' + table.replace('"', '""') + '"'
+                    sizes[table.lower()] = connection.execute(f"SELECT COUNT(*) FROM {quoted_table}").fetchone()[0]
+                except sqlite3.Error:
+                    continue
+        finally:
+            self.release(connection, connection_version)
+
+        self.table_sizes_cache = (version, sizes)
+        return sizes
+
+    def query(self, sql: str) -> dict:
+        """
+        Executes a query without raising.
+        :return: {"columns": [...], "rows": [...], "truncated": bool, "error": str or None}.
+        """
+        try:
+            columns, rows, truncated = self.execute(sql)
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                error = f"the query took longer than {self.timeout_seconds} seconds and was stopped."
+            else:
+                error = str(e)
+            return {"columns": [], "rows": [], "truncated": False, "error": error}
+        except sqlite3.Error as e:
+            return {"columns": [], "rows": [], "truncated": False, "error": str(e)}
+
+        return {"columns": columns, "rows": rows, "truncated": truncated, "error": None}
+
+    @staticmethod
+    def render(result: dict) -> str:
+        """
+        Renders a query() result for the answer prompt, the way the LangChain SQL tool
+        did: the rows as a Python list, or an "Error: ..." message.
+        """
+        if result["error"]:
+            return f"Error: {result['error']}"
+
+        rendered = str(result["rows"])
+        if result["truncated"]:
+            rendered += f"\n(Result truncated to the first {len(result['rows'])} rows.)"
+        return rendered
+
+    def run(self, sql: str) -> str:
+        """
+        Executes a query and renders the result as text.
+        """
+        return self.render(self.query(sql))
+
+    def close(self) -> None:
+        """
+        Closes all connections, waiting for running queries to finish.
+        """
+        entries = [self.pool.get() for _ in range(self.pool_size)]
+        for connection, _ in entries:
+            if connection is not None:
+                connection.close()
+            self.pool.put((None, None))
@@ -0,0 +1,143 @@
+import logging
+import os
+import sqlite3
+import threading
+
+NUMERIC_TYPES = ("INT", "REAL", "FLOA", "DOUB", "NUM", "DEC")
+
+
+class SchemaContext:
+    """
+    Builds a compact description of the SQLite schema for NL-to-SQL prompts: one line
+    per column with its type, the full value domain of low-cardinality text columns
+    (e.g. Brand, Body_Type, Fuel_Type, Gearbox_Type), the range of numeric columns and
+    a couple of example values for free-text columns.
+
+    The description is computed once and cached until the database file changes.
+    """
+
+    def __init__(self, database_path: str, max_domain_values: int = 50, example_values: int = 2):
+        """
+        :param database_path: Path of the SQLite database file.
+        :param max_domain_values: Text columns with at most this many distinct values list them all.
+        :param example_values: Number of example values shown for other text columns.
+        """
+        self.database_path = database_path
+        self.max_domain_values = max_domain_values
+        self.example_values = example_values
+
+        self.context = None
+        self.context_version = None
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def version(self) -> str:
+        """
+        Returns a version string that changes whenever the database file is replaced or modified.
+        """
+        try:
+            stat = os.stat(self.database_path)
+        except OSError:
+            return "missing"
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def get(self) -> str:
+        """
+        Returns the schema description, rebuilding it if the database file has changed.
+        """
+        version = self.version()
+        if self.context is not None and self.context_version == version:
+            return self.context
+
+        with self.lock:
+            if self.context is None or self.context_version != version:
+                self.context = self.build()
+                self.context_version = version
+                self.logger.info(f"Schema context built for database version {version}.")
+            return self.context
+
+    def build(self) -> str:
+        connection = sqlite3.connect(f"file:{self.database_path}?mode=ro", uri=True)
+        try:
+            tables = connection.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            ).fetchall()
+
+            # Full-text tables get a usage hint; their internal shadow tables are left out.
+            fts_tables = [name for name, sql in tables if "USING FTS5" in (sql or "").upper()]
+            shadow_tables = {
+                f"{fts_table}_{suffix}"
+                for fts_table in fts_tables
+                for suffix in ("data", "idx", "content", "docsize", "config")
+            }
+
+            descriptions = []
+            for name, _ in tables:
+                if name in shadow_tables:
+                    continue
+                if name in fts_tables:
+                    descriptions.append(self.describe_fts_table(connection, name))
+                else:
+                    descriptions.append(self.describe_table(connection, name))
+            return "\n\n".join(descriptions)
+        finally:
+            connection.close()
+
+    def describe_table(self, connection: sqlite3.Connection, table: str) -> str:
+        quoted_table = self.quote(table)
+        row_count = connection.execute(f"SELECT COUNT(*) FROM {quoted_table}").fetchone()[0]
+        lines = [f"Table {table} ({row_count} rows):"]
+
+        for _, column, column_type, *_ in connection.execute(f"PRAGMA table_info({quoted_table})"):
+            column_type = (column_type or "TEXT").upper()
+            quoted_column = self.quote(column)
+
+            if any(numeric in column_type for numeric in NUMERIC_TYPES):
+                low, high = connection.execute(
+                    f"SELECT MIN({quoted_column}), MAX({quoted_column}) FROM {quoted_table}"
+                ).fetchone()
+                lines.append(f"- {column} {column_type}: {self.format_value(low)} to {self.format_value(high)}")
+                continue
+
+            distinct_count = connection.execute(
+                f"SELECT COUNT(DISTINCT {quoted_column}) FROM {quoted_table}"
+            ).fetchone()[0]
+            if distinct_count <= self.max_domain_values:
+                values = [
+                    row[0] for row in connection.execute(
+                        f"SELECT DISTINCT {quoted_column} FROM {quoted_table} "
+                        f"WHERE {quoted_column} IS NOT NULL ORDER BY 1"
+                    )
+                ]
+                lines.append(f"- {column} {column_type}: one of {', '.join(repr(value) for value in values)}")
+            else:
+                examples = [
+                    row[0] for row in connection.execute(
+                        f"SELECT {quoted_column} FROM {quoted_table} WHERE {quoted_column} IS NOT NULL LIMIT ?",
+                        (self.example_values,)
+                    )
+                ]
+                lines.append(
+                    f"- {column} {column_type}: free text, {distinct_count} distinct values, "
+                    f"e.g. {', '.join(repr(value) for value in examples)}"
+                )
+
+        return "\n".join(lines)
+
+    def describe_fts_table(self, connection: sqlite3.Connection, table: str) -> str:
+        columns = [row[1] for row in connection.execute(f"PRAGMA table_info({self.quote(table)})")]
+        content_table = table[:-len("_fts")] if table.endswith("_fts") else "the main table"
+        return (
+            f"Full-text index {table} over {', '.join(columns)} of {content_table}; "
+            f"match whole words with: rowid IN (SELECT rowid FROM {table} WHERE {table} MATCH 'word')"
+        )
+
+    @staticmethod
+    def quote(identifier: str) -> str:
+        return '"' + identifier.replace('"', '""') + '"'
+
+    @staticmethod
+    def format_value(value) -> str:
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
@@ -0,0 +1,5 @@
+from .SchemaContext import SchemaContext
+from .SQLiteExecutor import SQLiteExecutor
+from .SQLQueryCache import SQLQueryCache
+from .QueryGuard import QueryGuard, QueryRejected
+from .ResultFormatter import ResultFormatter
@@ -0,0 +1,43 @@
+import pytest
+
+from controllers.IntentRouterController import IntentRouterController, IntentEnums
+
+
+@pytest.fixture
+def router():
+    # Built without the car database: a few catalog terms are enough for the rules.
+    router = object.__new__(IntentRouterController)
+    router.confidence_threshold = 0.8
+    router.classifier = None
+    router.catalog_terms = {"toyota", "honda", "bmw", "camry", "accord"}
+    router.catalog_pattern = IntentRouterController.compile_catalog_pattern(router.catalog_terms)
+    return router
+
+
+@pytest.mark.parametrize("message", [
+    "Can you show me how to change a tire?",
+    "How many miles before an oil change?",
+    "What is the average lifespan of a car battery?",
+    "Find me a good mechanic near me",
+    "Is leasing better than buying over 3 years?",
+    "What is the total cost of ownership of an EV?",
+    "My Toyota makes a weird noise, what should I do?",
+    "How does a hybrid engine work?",
+    "What is the difference between AWD and 4WD?",
+])
+def test_general_questions_are_not_routed_to_sql(router, message):
+    _, confidence = router.route(message)
+    assert not router.is_confident(confidence)
+
+
+@pytest.mark.parametrize("message", [
+    "What is the cheapest Toyota?",
+    "Which BMW has the highest horsepower?",
+    "How many Honda models are there?",
+    "Show me SUVs under $30,000",
+    "Average price of hybrid sedans",
+])
+def test_catalog_questions_are_routed_to_sql(router, message):
+    intent, confidence = router.route(message)
+    assert intent == IntentEnums.SQL.value
+    assert router.is_confident(confidence)